@@ -0,0 +1,214 @@
+"""
+Benchmark reorder planning on synthetic arrays, without a database.
+
+Compares the vectorized plan in inventory/reorder.py against the same rules
+applied one pair at a time in Python, and checks that both pick the same
+supplier, unit cost, quantity and cost for every pair. Also times the load
+phase: load_inputs parsing the COPY output, fed from pre-rendered CSV so
+only the parse and demand lookup are measured, not the database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_reorder --pairs 1000000
+    python -m benchmarks.bench_reorder --pairs 100000 1000000 --skip-loop --output reorder.json
+"""
+import argparse
+import io
+import json
+import math
+import statistics
+import time
+
+import numpy as np
+
+from inventory.reorder import (ReorderInputs, compute_plan, load_inputs, summarize, top_orders,
+                               REORDER_TARGET_MULTIPLIER, REORDER_REVIEW_DAYS, REORDER_DEFAULT_LEAD_TIME_DAYS)
+
+WAREHOUSES = 20
+
+def make_inputs(pairs: int, seed: int = 42) -> ReorderInputs:
+    """Pairs spread over WAREHOUSES warehouses, 0-3 supplier offers per product, ~10% low stock"""
+    rng = np.random.default_rng(seed)
+    products = max(pairs // WAREHOUSES, 1)
+    product_ids = np.repeat(np.arange(1, products + 1), WAREHOUSES)[:pairs]
+    warehouse_ids = np.tile(np.arange(1, WAREHOUSES + 1), products)[:pairs]
+
+    product_levels = rng.integers(5, 61, products).astype(np.float64)
+    product_prices = np.round(np.minimum(rng.lognormal(3.5, 1.1, products), 5000), 2)
+    reorder_levels = product_levels[product_ids - 1]
+    low = rng.random(pairs) < 0.1
+    quantities = np.where(low, np.floor(rng.random(pairs) * (reorder_levels + 1)),
+                          rng.integers(1, 10, pairs) * reorder_levels + 1)
+    # Half of the pairs have demand history
+    demand = np.where(rng.random(pairs) < 0.5, np.round(rng.gamma(2.0, 1.5, pairs), 2), 0.0)
+
+    offer_counts = rng.integers(0, 4, products)
+    offer_products = np.repeat(np.arange(1, products + 1), offer_counts)
+    offers = len(offer_products)
+    pack_sizes = rng.choice([1, 1, 1, 5, 6, 10, 12, 24], offers).astype(np.float64)
+
+    return ReorderInputs(
+        product_ids=product_ids,
+        warehouse_ids=warehouse_ids,
+        quantities=quantities,
+        reorder_levels=reorder_levels,
+        prices=product_prices[product_ids - 1],
+        demand=demand,
+        offer_product_ids=offer_products,
+        offer_supplier_ids=rng.integers(1, 501, offers),
+        offer_unit_costs=np.round(product_prices[offer_products - 1] * rng.uniform(0.45, 0.8, offers), 2),
+        offer_lead_times=rng.integers(2, 22, offers).astype(np.float64),
+        offer_min_qty=pack_sizes * rng.integers(1, 5, offers),
+        offer_pack_sizes=pack_sizes,
+    )
+
+def render_csv(inputs: ReorderInputs) -> dict:
+    """The COPY output load_inputs would receive for these inputs, keyed by the table each query reads"""
+    def csv(columns, fmt):
+        buffer = io.BytesIO()
+        np.savetxt(buffer, np.column_stack(columns), fmt=fmt, delimiter=",")
+        return buffer.getvalue()
+
+    has_demand = inputs.demand > 0
+    return {
+        "FROM inventory": csv([inputs.product_ids, inputs.warehouse_ids, inputs.quantities,
+                               inputs.reorder_levels, inputs.prices], ["%d", "%d", "%d", "%d", "%.2f"]),
+        "FROM supplier_products": csv([inputs.offer_product_ids, inputs.offer_supplier_ids, inputs.offer_unit_costs,
+                                       inputs.offer_lead_times, inputs.offer_min_qty, inputs.offer_pack_sizes],
+                                      ["%d", "%d", "%.2f", "%d", "%d", "%d"]),
+        "FROM stock_movements_daily": csv([inputs.product_ids[has_demand], inputs.warehouse_ids[has_demand],
+                                           inputs.demand[has_demand]], ["%d", "%d", "%.2f"]),
+    }
+
+class CSVConnection:
+    """Stands in for a psycopg2 connection whose COPY queries return pre-rendered CSV"""
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        # to_regclass('stock_movements_daily'): the rollups exist
+        return ("stock_movements_daily",)
+
+    def copy_expert(self, sql, buffer):
+        for table, data in self.tables.items():
+            if table in sql:
+                buffer.write(data)
+                return
+
+    def close(self):
+        pass
+
+def loop_plan(inputs: ReorderInputs) -> list:
+    """
+    The same rules one pair at a time, as a per-row implementation would do it.
+    Returns (supplier_id, unit_cost, order_quantity, order_cost) per pair.
+    """
+    best = {}
+    for product_id, supplier_id, cost, lead_time, min_qty, pack_size in zip(
+            inputs.offer_product_ids.tolist(), inputs.offer_supplier_ids.tolist(), inputs.offer_unit_costs.tolist(),
+            inputs.offer_lead_times.tolist(), inputs.offer_min_qty.tolist(), inputs.offer_pack_sizes.tolist()):
+        current = best.get(product_id)
+        if current is None or (cost, lead_time) < (current[1], current[2]):
+            best[product_id] = (supplier_id, cost, lead_time, min_qty, pack_size)
+
+    plan = []
+    for product_id, quantity, level, price, demand in zip(
+            inputs.product_ids.tolist(), inputs.quantities.tolist(), inputs.reorder_levels.tolist(),
+            inputs.prices.tolist(), inputs.demand.tolist()):
+        supplier_id, cost, lead_time, min_qty, pack_size = best.get(
+            product_id, (0, price, REORDER_DEFAULT_LEAD_TIME_DAYS, 1.0, 1.0))
+        projected = quantity - demand * lead_time
+        if projected > level:
+            plan.append((supplier_id, cost, 0.0, 0.0))
+            continue
+        target = level * REORDER_TARGET_MULTIPLIER + demand * (lead_time + REORDER_REVIEW_DAYS)
+        order = max(math.ceil(target - projected), max(min_qty, 1))
+        pack_size = max(pack_size, 1)
+        order = math.ceil(order / pack_size) * pack_size
+        plan.append((supplier_id, cost, order, order * cost))
+    return plan
+
+def compare_plans(expected: list, plan: dict) -> dict:
+    """Number of pairs where each output of the vectorized plan differs from the loop"""
+    supplier_ids, unit_costs, quantities, costs = (np.array(column) for column in zip(*expected)) if expected \
+        else (np.empty(0),) * 4
+    return {
+        "supplier_id": int(np.count_nonzero(supplier_ids != plan["supplier_ids"])),
+        "unit_cost": int(np.count_nonzero(unit_costs != plan["unit_costs"])),
+        "order_quantity": int(np.count_nonzero(quantities != plan["order_quantity"])),
+        "order_cost": int(np.count_nonzero(~np.isclose(costs, plan["order_cost"], rtol=1e-12, atol=0))),
+    }
+
+def measure(fn, repeat: int) -> float:
+    """Median seconds over repeat runs"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized reorder planning")
+    parser.add_argument("--pairs", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-loop", action="store_true", help="skip the per-pair Python baseline")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for pairs in args.pairs:
+        inputs = make_inputs(pairs, args.seed)
+        connection = CSVConnection(render_csv(inputs))
+
+        def vectorized():
+            plan = compute_plan(inputs)
+            summarize(inputs, plan)
+            top_orders(inputs, plan, 100)
+
+        result = {
+            "pairs": pairs,
+            "load_ms": measure(lambda: load_inputs(connection), args.repeat) * 1000,
+            "vectorized_ms": measure(vectorized, args.repeat) * 1000,
+        }
+        plan = compute_plan(inputs)
+        summary = summarize(inputs, plan)
+        result.update(pairs_to_reorder=summary["pairs_to_reorder"], total_cost=summary["total_cost"])
+
+        # The plan from parsed CSV must match the plan from the in-memory arrays
+        loaded_plan = compute_plan(load_inputs(connection))
+        result["load_mismatches"] = int(np.count_nonzero(loaded_plan["order_quantity"] != plan["order_quantity"]))
+
+        print(f"\n{pairs:,} pairs: {summary['pairs_to_reorder']:,} to reorder, total cost {summary['total_cost']:,.2f}")
+        print(f"  load (CSV parse):   {result['load_ms']:>10.1f}ms  "
+              f"{'✅' if not result['load_mismatches'] else '❌'} loaded plan "
+              f"{'matches' if not result['load_mismatches'] else 'differs'}")
+        print(f"  vectorized plan:    {result['vectorized_ms']:>10.1f}ms")
+        print(f"  load + plan:        {result['load_ms'] + result['vectorized_ms']:>10.1f}ms")
+
+        if not args.skip_loop:
+            start = time.perf_counter()
+            expected = loop_plan(inputs)
+            result["loop_ms"] = (time.perf_counter() - start) * 1000
+            mismatches = compare_plans(expected, plan)
+            result["mismatches"] = mismatches
+            print(f"  per-pair loop:      {result['loop_ms']:>10.1f}ms  "
+                  f"({result['loop_ms'] / result['vectorized_ms']:.1f}x slower)")
+            differing = ", ".join(f"{count:,} {name}" for name, count in mismatches.items() if count)
+            print(f"  {'✅ plans match (supplier, unit cost, quantity, cost)' if not differing else f'❌ differ: {differing}'}")
+
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results, "timestamp": time.time()}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the result serialization paths used by /api/sql and /api/query.
+
+Compares the old path (RealDictCursor-style dicts -> jsonable_encoder -> json)
+against orjson straight from row tuples, in both payload shapes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --rows 10000 100000 1000000
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from mcp_system.serialization import dumps, shape_rows
+
+COLUMNS = ["product_id", "product_name", "category", "warehouse", "quantity",
+           "price", "total_value", "last_updated"]
+
+def make_rows(count: int, seed: int = 42):
+    """Generate inventory-like row tuples with the types psycopg2 returns"""
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        quantity = rng.randint(0, 500)
+        price = round(rng.uniform(1, 1000), 2)
+        rows.append((
+            i + 1,
+            f"Product {i + 1}",
+            rng.choice(["Electronics", "Clothing", "Home & Garden", "Sports & Outdoors", "Books"]),
+            rng.choice(["Main Warehouse - Downtown", "North Branch", "South Distribution Center"]),
+            quantity,
+            price,
+            Decimal(str(round(quantity * price, 2))),
+            start + datetime.timedelta(days=i % 365),
+        ))
+    return rows
+
+def legacy_path(rows):
+    """The previous path: dict per row, jsonable_encoder, stdlib json"""
+    results = [dict(zip(COLUMNS, row)) for row in rows]
+    return json.dumps(jsonable_encoder({"results": results})).encode("utf-8")
+
+def fast_rows_path(rows):
+    return dumps({"results": shape_rows(COLUMNS, rows, "rows")})
+
+def fast_columnar_path(rows):
+    return dumps({"results": shape_rows(COLUMNS, rows, "columnar")})
+
+def measure(fn, rows, repeat: int):
+    """Return (best seconds, peak traced bytes, payload size)"""
+    best = float("inf")
+    payload = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn(rows)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(payload)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query result serialization")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = [
+        ("legacy (jsonable_encoder + json)", legacy_path),
+        ("orjson rows", fast_rows_path),
+        ("orjson columnar", fast_columnar_path),
+    ]
+
+    for count in args.rows:
+        rows = make_rows(count)
+        print(f"\n{count:,} rows")
+        print(f"{'path':<34}{'time (ms)':>12}{'peak MB':>10}{'size MB':>10}{'speedup':>9}")
+        baseline = None
+        for name, fn in paths:
+            seconds, peak, size = measure(fn, rows, args.repeat)
+            baseline = baseline or seconds
+            print(f"{name:<34}{seconds * 1000:>12.1f}{peak / 1e6:>10.1f}{size / 1e6:>10.1f}{baseline / seconds:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure import-time startup cost: the time to import a module in a fresh
+interpreter, plus the slowest imports reported by -X importtime. The default
+module is database.db (models and engine setup, used by the data scripts);
+pass --module main to measure the API process.
+
+Run from the backend directory, on two commits to compare before/after:
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --module main --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def time_import(module: str) -> dict:
+    """Import a module in a new interpreter; returns import and process wall time in ms"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return {"import_ms": float(result.stdout.strip().splitlines()[-1]), "process_ms": process_ms}
+
+def slowest_imports(module: str, top: int) -> list:
+    """Cumulative self+children import times from -X importtime, slowest first"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        entries.append({"module": name.strip(), "cumulative_ms": int(cumulative_us) / 1000})
+    entries.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return entries[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import time")
+    parser.add_argument("--module", default="database.db",
+                        help="module to import (default: the SQLAlchemy models and engine setup)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    # One warm-up run so the filesystem cache and .pyc files are in place
+    time_import(args.module)
+    runs = [time_import(args.module) for _ in range(args.runs)]
+    imports = [run["import_ms"] for run in runs]
+    processes = [run["process_ms"] for run in runs]
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms": {"median": statistics.median(imports), "min": min(imports), "max": max(imports)},
+        "process_ms": {"median": statistics.median(processes), "min": min(processes), "max": max(processes)},
+        "slowest_imports": slowest_imports(args.module, args.top),
+        "timestamp": time.time(),
+    }
+
+    print(f"import {args.module}: median {report['import_ms']['median']:.1f}ms "
+          f"(min {report['import_ms']['min']:.1f}ms), whole process median {report['process_ms']['median']:.1f}ms")
+    print("\nSlowest imports (cumulative):")
+    for entry in report["slowest_imports"]:
+        print(f"  {entry['cumulative_ms']:>8.1f}ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
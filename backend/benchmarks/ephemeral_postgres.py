@@ -0,0 +1,108 @@
+"""
+Throwaway PostgreSQL cluster for offline benchmarks.
+
+Creates a cluster with initdb in a temporary directory, starts it on a free
+port with a Unix socket in the same directory, loads database/smart_ims.sql
+and removes everything on exit. Needs the PostgreSQL server binaries
+(initdb, pg_ctl) on PATH or in --pg-bin.
+"""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+import psycopg2
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "database", "smart_ims.sql")
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class EphemeralPostgres:
+    """
+    Context manager for a temporary PostgreSQL cluster.
+
+    Args:
+        pg_bin: Directory containing initdb and pg_ctl; PATH is used if omitted
+        database: Name of the database to create
+    """
+
+    def __init__(self, pg_bin: Optional[str] = None, database: str = "smartims"):
+        self.pg_bin = pg_bin
+        self.database = database
+        self.user = "postgres"
+        self.port = _free_port()
+        self.directory = None
+
+    def _binary(self, name: str) -> str:
+        path = os.path.join(self.pg_bin, name) if self.pg_bin else shutil.which(name)
+        if not path or not os.path.exists(path):
+            raise RuntimeError(f"{name} not found; install the PostgreSQL server or pass --pg-bin")
+        return path
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """DB_* settings pointing the backend at this cluster"""
+        return {
+            "DB_HOST": "127.0.0.1",
+            "DB_PORT": str(self.port),
+            "DB_NAME": self.database,
+            "DB_USER": self.user,
+            "DB_PASSWORD": "",
+        }
+
+    def connect(self, database: Optional[str] = None):
+        return psycopg2.connect(host="127.0.0.1", port=self.port, user=self.user,
+                                database=database or self.database)
+
+    def start(self) -> "EphemeralPostgres":
+        self.directory = tempfile.mkdtemp(prefix="smart_ims_pg_")
+        data_dir = os.path.join(self.directory, "data")
+
+        subprocess.run([self._binary("initdb"), "-D", data_dir, "-U", self.user, "-A", "trust", "--no-sync"],
+                       check=True, stdout=subprocess.DEVNULL)
+        # Durability is irrelevant for a throwaway benchmark database
+        options = f"-p {self.port} -k {self.directory} -c fsync=off -c synchronous_commit=off " \
+                  f"-c full_page_writes=off -c listen_addresses=127.0.0.1"
+        subprocess.run([self._binary("pg_ctl"), "-D", data_dir, "-o", options, "-w",
+                        "-l", os.path.join(self.directory, "postgres.log"), "start"],
+                       check=True, stdout=subprocess.DEVNULL)
+
+        conn = self.connect("postgres")
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE {self.database}")
+        conn.close()
+
+        self.load_schema()
+        return self
+
+    def load_schema(self):
+        """Create the tables and sample rows from smart_ims.sql"""
+        with open(SCHEMA_FILE) as f:
+            schema_sql = f.read()
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(schema_sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stop(self):
+        if not self.directory:
+            return
+        subprocess.run([self._binary("pg_ctl"), "-D", os.path.join(self.directory, "data"),
+                        "-m", "immediate", "stop"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,158 @@
+"""
+Offline stand-in for the Ollama HTTP API.
+
+Answers /api/tags and /api/generate with canned SQL for the question in the
+prompt, after a configurable base latency plus token generation time.
+
+Run standalone from the backend directory:
+    python -m benchmarks.fake_ollama --port 11434 --latency-ms 150 --tokens-per-second 40
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned SQL, picked by the first keyword found in the question
+CANNED_SQL = [
+    ("add", "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (1, 1, 10) "
+            "ON CONFLICT (product_id, warehouse_id) DO UPDATE SET quantity = inventory.quantity + 10;"),
+    ("reorder", "SELECT p.name, w.location, i.quantity, p.reorder_level FROM products p "
+                "JOIN inventory i ON p.id = i.product_id JOIN warehouses w ON i.warehouse_id = w.id "
+                "WHERE i.quantity <= p.reorder_level;"),
+    ("low", "SELECT p.name, c.name AS category, i.quantity, p.reorder_level, w.location FROM products p "
+            "JOIN categories c ON p.category_id = c.id JOIN inventory i ON p.id = i.product_id "
+            "JOIN warehouses w ON i.warehouse_id = w.id WHERE i.quantity <= p.reorder_level;"),
+    ("per warehouse", "SELECT w.location, SUM(i.quantity * p.price) AS total_value FROM inventory i "
+                      "JOIN products p ON i.product_id = p.id JOIN warehouses w ON i.warehouse_id = w.id "
+                      "GROUP BY w.location;"),
+    ("value", "SELECT SUM(i.quantity * p.price) AS total_value FROM inventory i "
+              "JOIN products p ON i.product_id = p.id;"),
+    ("most valuable", "SELECT p.name, SUM(i.quantity * p.price) AS total_value FROM inventory i "
+                      "JOIN products p ON i.product_id = p.id GROUP BY p.name ORDER BY total_value DESC LIMIT 10;"),
+]
+DEFAULT_SQL = "SELECT p.name, i.warehouse_id, i.quantity FROM products p JOIN inventory i ON p.id = i.product_id LIMIT 50;"
+
+def sql_for_prompt(prompt: str) -> str:
+    """Pick canned SQL for the last 'User:' line of the prompt"""
+    question = prompt.rsplit("User:", 1)[-1].lower()
+    for keyword, sql in CANNED_SQL:
+        if keyword in question:
+            return sql
+    return DEFAULT_SQL
+
+class FakeOllama:
+    """
+    Threaded HTTP server imitating the parts of the Ollama API the backend uses.
+
+    Args:
+        port: Port to listen on, 0 for any free port
+        latency_ms: Fixed delay before generation starts (model load / prompt eval)
+        tokens_per_second: Simulated generation speed
+        jitter: Relative random variation applied to the delay
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 100.0,
+                 tokens_per_second: float = 50.0, jitter: float = 0.1, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def generation_delay(self, tokens: int) -> float:
+        """Seconds to answer a prompt producing the given number of tokens"""
+        delay = self.latency_ms / 1000 + tokens / self.tokens_per_second
+        with self._lock:
+            self.requests += 1
+            variation = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay * (1 + variation))
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "gemma3:latest"}]})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self._send_json({"error": "not found"}, 404)
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                sql = sql_for_prompt(payload.get("prompt", ""))
+                # Roughly one token per four characters, as for English/SQL text
+                tokens = max(1, len(sql) // 4)
+                delay = fake.generation_delay(tokens)
+                time.sleep(delay)
+
+                self._send_json({
+                    "model": payload.get("model", "gemma3:latest"),
+                    "response": sql,
+                    "done": True,
+                    "eval_count": tokens,
+                    "eval_duration": int(tokens / fake.tokens_per_second * 1e9),
+                    "total_duration": int(delay * 1e9),
+                })
+
+        return Handler
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.host, args.port, args.latency_ms, args.tokens_per_second, args.jitter)
+    print(f"🤖 Fake Ollama listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+End-to-end API benchmark that runs fully offline.
+
+Starts a throwaway PostgreSQL cluster (or uses the database from .env with
+--use-env-db), a fake Ollama server and the FastAPI app under uvicorn, then
+drives the endpoints at each concurrency level and records throughput and
+p50/p95/p99 latency as JSON.
+
+Run from the backend directory:
+    python -m benchmarks.run_benchmarks --concurrency 1 8 32 --requests 500 --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json   # fail on regressions
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.ephemeral_postgres import EphemeralPostgres
+from benchmarks.fake_ollama import FakeOllama
+
+ENDPOINTS = ["query", "sql", "summary", "low-stock", "add"]
+
+BENCH_SQL = (
+    "SELECT p.name, c.name AS category, w.location, i.quantity FROM products p "
+    "JOIN categories c ON p.category_id = c.id JOIN inventory i ON p.id = i.product_id "
+    "JOIN warehouses w ON i.warehouse_id = w.id ORDER BY i.quantity LIMIT 100"
+)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def build_requests(endpoint: str, count: int, dataset: Dict[str, int], seed: int) -> List[Dict[str, Any]]:
+    """Pre-build the request list for an endpoint so generation is not timed"""
+    rng = random.Random(f"{seed}:{endpoint}")
+    if endpoint == "query":
+        # Imported late: database modules read the DB_* settings on import
+        from database.generate_data import generate_questions
+        questions = generate_questions(count, dataset["products"], dataset["warehouses"],
+                                       dataset["categories"], seed)
+        return [{"method": "POST", "path": "/api/query", "json": {"question": item["question"]}}
+                for item in questions]
+    if endpoint == "sql":
+        return [{"method": "POST", "path": "/api/sql", "json": {"sql": BENCH_SQL}}] * count
+    if endpoint == "summary":
+        return [{"method": "GET", "path": "/api/inventory/summary"}] * count
+    if endpoint == "low-stock":
+        return [{"method": "GET", "path": "/api/inventory/low-stock"}] * count
+    if endpoint == "add":
+        return [{"method": "POST", "path": "/api/inventory/add", "json": {
+            "product_id": rng.randint(1, dataset["products"]),
+            "warehouse_id": rng.randint(1, dataset["warehouses"]),
+            "quantity": rng.randint(1, 20),
+        }} for _ in range(count)]
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+def run_load(base_url: str, batch: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Send every request in the batch with the given concurrency and summarize"""
+    local = threading.local()
+
+    def send(item) -> Optional[float]:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = local.session.request(item["method"], base_url + item["path"],
+                                             json=item.get("json"), timeout=120)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        return elapsed if ok else None
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send, batch))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(outcome * 1000 for outcome in outcomes if outcome is not None)
+    return {
+        "requests": len(batch),
+        "errors": len(batch) - len(latencies),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+def start_api(port: int):
+    """Import the app (after env is configured) and serve it from a background thread"""
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Print the change against a baseline run; returns True if anything regressed"""
+    regressed = False
+    old_results = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for result in current["results"]:
+        old = old_results.get((result["endpoint"], result["concurrency"]))
+        if not old:
+            continue
+        p95_change = (result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) if old["latency_ms"]["p95"] else 0.0
+        rps_change = (result["throughput_rps"] / old["throughput_rps"] - 1) if old["throughput_rps"] else 0.0
+        flag = ""
+        if p95_change > threshold or rps_change < -threshold:
+            regressed = True
+            flag = "  ⚠️  regression"
+        print(f"  {result['endpoint']:<10} c={result['concurrency']:<4} "
+              f"p95 {p95_change:+.1%}  throughput {rps_change:+.1%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for the Smart-IMS API")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--ollama-latency-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--pg-bin", help="directory with initdb/pg_ctl for the throwaway cluster")
+    parser.add_argument("--use-env-db", action="store_true", help="benchmark against the database in .env")
+    parser.add_argument("--products", type=int, default=0, help="load a generated dataset of this many products")
+    parser.add_argument("--warehouses", type=int, default=20)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--regression-threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        if not args.use_env_db:
+            postgres = stack.enter_context(EphemeralPostgres(args.pg_bin))
+            os.environ.update(postgres.env)
+            print(f"🐘 Throwaway PostgreSQL on port {postgres.port}")
+
+        # Sizes of the bundled sample data unless a generated dataset is loaded
+        dataset = {"products": 15, "warehouses": 3, "categories": 5}
+        if args.products:
+            from database.generate_data import load_database
+            dataset = {"products": args.products, "warehouses": args.warehouses, "categories": args.categories}
+            print(f"📦 Loading {args.products:,} products x {args.warehouses} warehouses...")
+            load_database(args.categories, args.products, args.warehouses, 100, 0.3, 0.1, args.seed)
+
+        ollama = stack.enter_context(FakeOllama(latency_ms=args.ollama_latency_ms,
+                                                tokens_per_second=args.tokens_per_second))
+        os.environ["OLLAMA_BASE_URL"] = ollama.url
+        print(f"🤖 Fake Ollama on {ollama.url}")
+
+        server, thread = start_api(args.port)
+        stack.callback(thread.join, 5)
+        stack.callback(setattr, server, "should_exit", True)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+        results = []
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                run_load(base_url, build_requests(endpoint, args.warmup, dataset, args.seed + 1), concurrency)
+                summary = run_load(base_url, build_requests(endpoint, args.requests, dataset, args.seed), concurrency)
+                summary.update({"endpoint": endpoint, "concurrency": concurrency})
+                results.append(summary)
+                latency = summary["latency_ms"]
+                print(f"{endpoint:<10} c={concurrency:<4} {summary['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {latency['p50']:>8.1f}ms  p95 {latency['p95']:>8.1f}ms  "
+                      f"p99 {latency['p99']:>8.1f}ms  errors {summary['errors']}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.regression_threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.engine import make_url
 import os
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
 from dotenv import load_dotenv
 import urllib.parse
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 # Database Models
@@ -46,6 +54,17 @@ class Supplier(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     contact = Column(String, nullable=True)
+    products = relationship('SupplierProduct', back_populates='supplier')
+
+class SupplierProduct(Base):
+    __tablename__ = 'supplier_products'
+    supplier_id = Column(Integer, ForeignKey('suppliers.id'), primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), primary_key=True)
+    unit_cost = Column(Float, nullable=False)
+    lead_time_days = Column(Integer, nullable=False, default=7)
+    min_order_qty = Column(Integer, nullable=False, default=1)
+    pack_size = Column(Integer, nullable=False, default=1)
+    supplier = relationship('Supplier', back_populates='products')
 
 # sqlalchemy engine and session setup
 DB_HOST = os.getenv('DB_HOST', '').strip('"\'')
@@ -56,12 +75,73 @@ DB_PASSWORD = urllib.parse.quote(os.getenv('DB_PASSWORD', '').strip('"\''))
 
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# printing url for debugging
-print("DATABASE_URL:", DATABASE_URL)
+# Engine and pool configuration
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').strip('"\'').lower() == 'true'
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+# Log every statement (at INFO) like SQLAlchemy's echo, but off the calling thread
+DB_ECHO = os.getenv('DB_ECHO', 'false').strip('"\'').lower() == 'true'
+DB_LOG_LEVEL = os.getenv('DB_LOG_LEVEL', 'INFO' if DB_ECHO else 'WARNING').strip('"\'').upper()
+
+_engine = None
+_session_factory = None
+_log_listener = None
+_lock = threading.Lock()
+
+def _configure_query_logging():
+    """
+    Send SQLAlchemy engine logs through a queue so formatting and writing
+    happen on a background thread, and gate them by DB_LOG_LEVEL.
+    """
+    global _log_listener
+    engine_logger = logging.getLogger('sqlalchemy.engine')
+    engine_logger.setLevel(DB_LOG_LEVEL)
+    if _log_listener is not None or not engine_logger.isEnabledFor(logging.INFO):
+        return
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+    _log_listener = logging.handlers.QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    engine_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    engine_logger.propagate = False
+
+def get_engine():
+    """Create the engine on first use and reuse it afterwards"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _configure_query_logging()
+                _engine = create_engine(
+                    DATABASE_URL,
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_pre_ping=DB_POOL_PRE_PING,
+                    pool_recycle=DB_POOL_RECYCLE
+                )
+                logger.debug(f"Database engine created for {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
+    return _engine
+
+def get_sessionmaker():
+    """Session factory bound to the lazily created engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory
 
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def __getattr__(name):
+    # Keep `from database.db import engine, SessionLocal` working without
+    # building the engine at import time
+    if name == 'engine':
+        return get_engine()
+    if name == 'SessionLocal':
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # creating the tables in the database
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
@@ -0,0 +1,285 @@
+"""
+Generate a large, deterministic synthetic dataset and bulk-load it with COPY.
+
+Run from the backend directory, e.g. for ~5M inventory rows:
+    python -m database.generate_data --products 100000 --warehouses 60 --sparsity 0.2
+
+Use --questions to also write a JSONL file of natural language questions
+about the generated data, for replaying against /api/query.
+"""
+import argparse
+import io
+import json
+import random
+import time
+from typing import Iterator, List
+
+from database.db import get_engine
+
+BASE_CATEGORIES = ["Electronics", "Clothing", "Home & Garden", "Sports & Outdoors", "Books",
+                   "Toys", "Grocery", "Automotive", "Health & Beauty", "Office Supplies"]
+ADJECTIVES = ["Basic", "Deluxe", "Compact", "Premium", "Classic", "Portable", "Smart", "Eco",
+              "Heavy-Duty", "Mini", "Pro", "Ultra", "Vintage", "Wireless", "Foldable", "Rugged"]
+NOUNS = ["Laptop", "Smartphone", "Tablet", "Headphones", "T-Shirt", "Jeans", "Sneakers",
+         "Coffee Maker", "Garden Hose", "Dining Chair", "Basketball", "Tent", "Hiking Boots",
+         "Programming Guide", "Fiction Novel", "Desk Lamp", "Backpack", "Water Bottle",
+         "Blender", "Monitor", "Keyboard", "Jacket", "Yoga Mat", "Camera"]
+CITIES = ["Downtown", "North Branch", "South Distribution Center", "East Side", "West End",
+          "Harbor", "Airport", "Riverside", "Uptown", "Industrial Park", "Lakeside", "Hillcrest"]
+
+# Relative weights of the question templates in the replay mix
+QUESTION_MIX = {
+    "low_stock": 25,
+    "low_stock_warehouse": 15,
+    "product_stock": 20,
+    "category_value": 10,
+    "warehouse_value": 10,
+    "top_products": 10,
+    "add_inventory": 10,
+}
+
+def category_name(index: int) -> str:
+    if index < len(BASE_CATEGORIES):
+        return BASE_CATEGORIES[index]
+    return f"{BASE_CATEGORIES[index % len(BASE_CATEGORIES)]} {index // len(BASE_CATEGORIES) + 1}"
+
+def product_name(index: int) -> str:
+    adjective = ADJECTIVES[index % len(ADJECTIVES)]
+    noun = NOUNS[(index // len(ADJECTIVES)) % len(NOUNS)]
+    return f"{adjective} {noun} {index + 1}"
+
+def warehouse_location(index: int) -> str:
+    if index == 0:
+        return "Main Warehouse - Downtown"
+    return f"{CITIES[index % len(CITIES)]} Warehouse {index + 1}"
+
+def _rng(seed: int, stream: str) -> random.Random:
+    """Independent RNG per table so changing one count does not reshuffle the others"""
+    return random.Random(f"{seed}:{stream}")
+
+def _csv_value(value) -> str:
+    text = str(value)
+    if any(ch in text for ch in ',"\n'):
+        text = '"' + text.replace('"', '""') + '"'
+    return text
+
+def _csv_lines(rows: Iterator[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield ",".join(_csv_value(value) for value in row) + "\n"
+
+class _LineReader(io.RawIOBase):
+    """File-like wrapper so copy_expert can pull CSV lines from a generator"""
+
+    def __init__(self, lines: Iterator[str]):
+        super().__init__()
+        self.lines = lines
+        self.buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            data = line.encode("utf-8")
+            chunks.append(data)
+            length += len(data)
+        data = b"".join(chunks)
+        if size < 0:
+            self.buffer = b""
+            return data
+        self.buffer = data[size:]
+        return data[:size]
+
+def category_rows(count: int):
+    for index in range(count):
+        yield index + 1, category_name(index)
+
+def warehouse_rows(count: int):
+    for index in range(count):
+        yield index + 1, warehouse_location(index)
+
+def supplier_rows(count: int, seed: int):
+    rng = _rng(seed, "suppliers")
+    for index in range(count):
+        name = f"{rng.choice(['Global', 'Prime', 'Metro', 'Summit', 'Apex', 'Pioneer'])} " \
+               f"{rng.choice(['Supply', 'Distributors', 'Traders', 'Wholesale', 'Goods'])} {index + 1}"
+        yield index + 1, name, f"orders{index + 1}@supplier{index + 1}.com"
+
+def product_rows(count: int, categories: int, seed: int):
+    rng = _rng(seed, "products")
+    for index in range(count):
+        price = round(min(rng.lognormvariate(3.5, 1.1), 5000), 2)
+        reorder_level = rng.randint(5, 60)
+        yield index + 1, product_name(index), rng.randint(1, categories), price, reorder_level
+
+def reorder_levels(count: int, categories: int, seed: int) -> List[int]:
+    """Reorder level per product, replayed from the same RNG stream as product_rows"""
+    return [row[4] for row in product_rows(count, categories, seed)]
+
+def supplier_product_rows(products: int, categories: int, suppliers: int, seed: int):
+    """One to three supplier offers per product, at a discount to its list price"""
+    rng = _rng(seed, "supplier_products")
+    for product_id, _, _, price, _ in product_rows(products, categories, seed):
+        for supplier_id in rng.sample(range(1, suppliers + 1), min(suppliers, rng.randint(1, 3))):
+            pack_size = rng.choice([1, 1, 1, 5, 6, 10, 12, 24])
+            yield (supplier_id, product_id, round(price * rng.uniform(0.45, 0.8), 2), rng.randint(2, 21),
+                   pack_size * rng.randint(1, 4), pack_size)
+
+def inventory_rows(products: int, warehouses: int, categories: int, sparsity: float,
+                   low_stock_ratio: float, seed: int):
+    """
+    One row per stocked (product, warehouse) pair.
+
+    Args:
+        sparsity: Fraction of product/warehouse pairs with no inventory row
+        low_stock_ratio: Fraction of stocked pairs at or below their reorder level
+    """
+    rng = _rng(seed, "inventory")
+    levels = reorder_levels(products, categories, seed)
+    for product_index in range(products):
+        level = levels[product_index]
+        for warehouse_index in range(warehouses):
+            if rng.random() < sparsity:
+                continue
+            if rng.random() < low_stock_ratio:
+                quantity = rng.randint(0, level)
+            else:
+                quantity = rng.randint(level + 1, level * 10)
+            yield product_index + 1, warehouse_index + 1, quantity
+
+def generate_questions(count: int, products: int, warehouses: int, categories: int, seed: int) -> Iterator[dict]:
+    """
+    Yield a weighted mix of natural language questions about the generated data.
+    Each item has the question and whether it reads or writes.
+    """
+    rng = _rng(seed, "questions")
+    kinds = list(QUESTION_MIX)
+    weights = list(QUESTION_MIX.values())
+    for _ in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        product = product_name(rng.randrange(products))
+        warehouse = rng.randrange(warehouses)
+        category = category_name(rng.randrange(categories))
+
+        if kind == "low_stock":
+            question = rng.choice(["Show me low stock items", "Which items are below their reorder level?",
+                                   "What products need to be reordered?"])
+        elif kind == "low_stock_warehouse":
+            question = f"Which products are low on stock at {warehouse_location(warehouse)}?"
+        elif kind == "product_stock":
+            question = rng.choice([f"How many {product} do we have in stock?",
+                                   f"Show stock levels of {product} in every warehouse"])
+        elif kind == "category_value":
+            question = f"What's the total value of {category} inventory?"
+        elif kind == "warehouse_value":
+            question = rng.choice(["What's the total inventory value per warehouse?",
+                                   f"What is the inventory value at {warehouse_location(warehouse)}?"])
+        elif kind == "top_products":
+            question = f"What are the {rng.choice([5, 10, 20])} most valuable products in {category}?"
+        else:
+            question = f"Add {rng.randint(1, 200)} {product} to warehouse {warehouse + 1}"
+
+        yield {"question": question, "kind": kind, "writes": kind == "add_inventory"}
+
+def copy_rows(cursor, table: str, columns: List[str], rows) -> int:
+    """Stream rows into a table with COPY FROM STDIN, returning the row count"""
+    counted = 0
+
+    def counting():
+        nonlocal counted
+        for row in rows:
+            counted += 1
+            yield row
+
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        _LineReader(_csv_lines(counting())),
+        size=256 * 1024,
+    )
+    return counted
+
+def load_database(categories: int, products: int, warehouses: int, suppliers: int,
+                  sparsity: float, low_stock_ratio: float, seed: int):
+    """Replace all data with a generated dataset, in one transaction"""
+    conn = get_engine().raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("TRUNCATE supplier_products, inventory, products, categories, warehouses, suppliers "
+                       "RESTART IDENTITY CASCADE")
+        # The initial load is not a stock movement; old movements refer to replaced ids
+        cursor.execute("SET LOCAL smart_ims.ledger = 'off'")
+        cursor.execute("SELECT to_regclass('stock_movements')")
+        if cursor.fetchone()[0]:
+            cursor.execute("TRUNCATE stock_movements, stock_movements_hourly, stock_movements_daily")
+
+        tables = [
+            ("categories", ["id", "name"], category_rows(categories)),
+            ("warehouses", ["id", "location"], warehouse_rows(warehouses)),
+            ("suppliers", ["id", "name", "contact"], supplier_rows(suppliers, seed)),
+            ("products", ["id", "name", "category_id", "price", "reorder_level"],
+             product_rows(products, categories, seed)),
+            ("inventory", ["product_id", "warehouse_id", "quantity"],
+             inventory_rows(products, warehouses, categories, sparsity, low_stock_ratio, seed)),
+            ("supplier_products", ["supplier_id", "product_id", "unit_cost", "lead_time_days", "min_order_qty", "pack_size"],
+             supplier_product_rows(products, categories, suppliers, seed)),
+        ]
+
+        for table, columns, rows in tables:
+            start = time.perf_counter()
+            count = copy_rows(cursor, table, columns, rows)
+            print(f"- {table}: {count:,} rows in {time.perf_counter() - start:.1f}s")
+
+        # Keep SERIAL sequences ahead of the explicit ids
+        for table in ["categories", "warehouses", "suppliers", "products"]:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT MAX(id) FROM {table}), 1))"
+            )
+
+        conn.commit()
+        cursor.execute("ANALYZE")
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and bulk-load a synthetic Smart-IMS dataset")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--warehouses", type=int, default=20)
+    parser.add_argument("--suppliers", type=int, default=500)
+    parser.add_argument("--sparsity", type=float, default=0.3,
+                        help="fraction of product/warehouse pairs with no inventory row")
+    parser.add_argument("--low-stock-ratio", type=float, default=0.1,
+                        help="fraction of inventory rows at or below the reorder level")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--questions", type=int, default=0,
+                        help="number of natural language questions to write")
+    parser.add_argument("--questions-file", default="questions.jsonl")
+    parser.add_argument("--skip-load", action="store_true", help="only write the questions file")
+    args = parser.parse_args()
+
+    if not args.skip_load:
+        start = time.perf_counter()
+        print("Loading synthetic dataset...")
+        load_database(args.categories, args.products, args.warehouses, args.suppliers,
+                      args.sparsity, args.low_stock_ratio, args.seed)
+        print(f"✅ Dataset loaded in {time.perf_counter() - start:.1f}s")
+
+    if args.questions:
+        with open(args.questions_file, "w") as f:
+            for item in generate_questions(args.questions, args.products, args.warehouses,
+                                           args.categories, args.seed):
+                f.write(json.dumps(item) + "\n")
+        print(f"✅ Wrote {args.questions:,} questions to {args.questions_file}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,39 @@
-from database.db import create_tables
+import os
+
+from database.db import create_tables, get_engine
+from inventory.movements import ensure_partitions
+
+DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STOCK_NOTIFY_SQL = os.path.join(DATABASE_DIR, "stock_notify.sql")
+STOCK_MOVEMENTS_SQL = os.path.join(DATABASE_DIR, "stock_movements.sql")
+
+def apply_sql_file(path: str):
+    """Run a SQL script in one transaction"""
+    with open(path) as f:
+        sql = f.read()
+    conn = get_engine().raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+def install_stock_triggers():
+    """Create the NOTIFY triggers that keep API stock indexes current"""
+    apply_sql_file(STOCK_NOTIFY_SQL)
+
+def install_stock_ledger():
+    """Create the stock movement ledger, its rollups and this month's partitions"""
+    apply_sql_file(STOCK_MOVEMENTS_SQL)
+    conn = get_engine().raw_connection()
+    try:
+        ensure_partitions(conn)
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     create_tables()
-    print("All tables created successfully!") 
\ No newline at end of file
+    install_stock_triggers()
+    install_stock_ledger()
+    print("All tables created successfully!")
\ No newline at end of file
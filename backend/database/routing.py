@@ -0,0 +1,179 @@
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# Identifies the API client for read-your-writes; set per request by the API
+current_client: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_client", default=None)
+
+# Replica lag query; zero when the replica has replayed everything it received
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+class RoutedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that reports back to the router when closed"""
+
+    on_close = None
+
+    def close(self):
+        callback, self.on_close = self.on_close, None
+        try:
+            super().close()
+        finally:
+            if callback:
+                callback()
+
+class Replica:
+    """A read replica with its live connection count and last measured lag"""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.active = 0
+        self.lag: Optional[float] = None
+        self.lag_checked_at = 0.0
+
+    def __repr__(self):
+        host = next((part for part in self.dsn.split() if part.startswith("host=")), self.dsn.split("@")[-1])
+        return f"Replica({host})"
+
+class ReplicaRouter:
+    """
+    Routes read-only statements to replicas and everything else to the primary.
+    Replicas are picked round-robin or by fewest open connections, skipped
+    while their replication lag is above the limit, and bypassed for a
+    client that wrote recently (read-your-writes).
+    """
+
+    def __init__(self, primary: Dict[str, Any], replica_dsns: List[str], balancing: str = "round_robin",
+                 max_lag_seconds: float = 5.0, lag_check_interval: float = 5.0,
+                 read_your_writes_seconds: float = 10.0):
+        self.primary = primary
+        self.replicas = [Replica(dsn) for dsn in replica_dsns]
+        self.balancing = balancing
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._lock = threading.Lock()
+        self._round_robin = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._recent_writes: Dict[str, float] = {}
+        self.primary_active = 0
+
+    def connect_primary(self):
+        """Open a connection to the primary"""
+        conn = psycopg2.connect(connection_factory=RoutedConnection, **self.primary)
+        with self._lock:
+            self.primary_active += 1
+        conn.on_close = self._release_primary
+        return conn
+
+    def connect(self, read_only: bool = False):
+        """
+        Open a connection for a statement.
+
+        Args:
+            read_only: Whether the statement only reads data
+        """
+        if not read_only or not self.replicas or self._wrote_recently(current_client.get()):
+            return self.connect_primary()
+
+        for replica in self._candidates():
+            conn = self._connect_replica(replica)
+            if conn is not None:
+                return conn
+
+        logger.warning("No replica within lag limits, reading from primary")
+        return self.connect_primary()
+
+    def record_write(self, client_id: Optional[str] = None):
+        """
+        Remember that a client just wrote, so its reads go to the primary
+        until replicas have had time to catch up.
+
+        Args:
+            client_id: Client to pin; defaults to the current request's client
+        """
+        client_id = client_id or current_client.get()
+        if not client_id or not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[client_id] = now
+            # Drop expired entries so the map stays small
+            expired = [key for key, at in self._recent_writes.items() if now - at > self.read_your_writes_seconds]
+            for key in expired:
+                del self._recent_writes[key]
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Current replica state, for diagnostics"""
+        return [
+            {"replica": repr(replica), "active_connections": replica.active, "lag_seconds": replica.lag}
+            for replica in self.replicas
+        ]
+
+    def _wrote_recently(self, client_id: Optional[str]) -> bool:
+        if not client_id:
+            return False
+        with self._lock:
+            written_at = self._recent_writes.get(client_id)
+        return written_at is not None and time.monotonic() - written_at <= self.read_your_writes_seconds
+
+    def _candidates(self) -> List[Replica]:
+        """Replicas in the order they should be tried"""
+        with self._lock:
+            if self.balancing == "least_connections":
+                return sorted(self.replicas, key=lambda replica: replica.active)
+            start = next(self._round_robin)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def _connect_replica(self, replica: Replica):
+        """Connect to a replica, or return None if it is down or lagging"""
+        if replica.lag is not None and replica.lag > self.max_lag_seconds \
+                and time.monotonic() - replica.lag_checked_at < self.lag_check_interval:
+            return None
+
+        try:
+            conn = psycopg2.connect(replica.dsn, connection_factory=RoutedConnection)
+        except psycopg2.Error as e:
+            logger.warning(f"{replica!r} unavailable: {e}")
+            return None
+
+        if time.monotonic() - replica.lag_checked_at >= self.lag_check_interval:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(LAG_SQL)
+                    replica.lag = float(cursor.fetchone()[0])
+                conn.rollback()
+            except psycopg2.Error as e:
+                logger.warning(f"Lag check failed on {replica!r}: {e}")
+                conn.close()
+                return None
+            replica.lag_checked_at = time.monotonic()
+            if replica.lag > self.max_lag_seconds:
+                logger.warning(f"{replica!r} lagging by {replica.lag:.1f}s, skipping")
+                conn.close()
+                return None
+
+        with self._lock:
+            replica.active += 1
+        conn.on_close = lambda: self._release(replica)
+        return conn
+
+    def _release_primary(self):
+        with self._lock:
+            self.primary_active -= 1
+
+    def _release(self, replica: Replica):
+        with self._lock:
+            replica.active -= 1
@@ -1,11 +1,12 @@
-from database.db import SessionLocal, Category, Product, Warehouse, Inventory, Supplier
+from database.db import get_sessionmaker, Category, Product, Warehouse, Inventory, Supplier, SupplierProduct
 
 def seed_database():
     """Populate the database with sample data for testing"""
-    db = SessionLocal()
+    db = get_sessionmaker()()
     
     try:
         # Clear existing data (optional - remove if you want to keep existing data)
+        db.query(SupplierProduct).delete()
         db.query(Inventory).delete()
         db.query(Product).delete()
         db.query(Category).delete()
@@ -104,6 +105,22 @@ def seed_database():
         db.add_all(inventory_items)
         db.commit()
         
+        # Supplier terms: (supplier, product, unit cost, lead time days, minimum order, pack size)
+        offers = [
+            (0, 0, 720.00, 10, 5, 1), (0, 1, 510.00, 10, 5, 1), (0, 2, 285.00, 10, 5, 1), (0, 3, 95.00, 7, 10, 5),
+            (1, 4, 8.50, 14, 50, 25), (1, 5, 38.00, 14, 20, 10), (1, 6, 70.00, 14, 12, 6),
+            (2, 3, 99.00, 3, 5, 5), (2, 7, 52.00, 5, 6, 6), (2, 8, 12.00, 5, 20, 10), (2, 9, 95.00, 7, 4, 2),
+            (3, 10, 15.00, 6, 24, 12), (3, 11, 160.00, 10, 2, 1), (3, 12, 105.00, 8, 6, 2),
+            (4, 13, 28.00, 4, 10, 10), (4, 14, 6.50, 4, 25, 25),
+        ]
+        supplier_products = [
+            SupplierProduct(supplier_id=suppliers[s].id, product_id=products[p].id, unit_cost=cost,
+                            lead_time_days=lead_time, min_order_qty=min_qty, pack_size=pack)
+            for s, p, cost, lead_time, min_qty, pack in offers
+        ]
+        db.add_all(supplier_products)
+        db.commit()
+        
         print("✅ Database seeded successfully!")
         print("\nSample data created:")
         print(f"- {len(categories)} categories")
@@ -111,6 +128,7 @@ def seed_database():
         print(f"- {len(suppliers)} suppliers")
         print(f"- {len(products)} products")
         print(f"- {len(inventory_items)} inventory entries")
+        print(f"- {len(supplier_products)} supplier offers")
         print("\nSome items have been set to low stock for testing purposes.")
         
     except Exception as e:
@@ -1,3 +1,4 @@
+DROP TABLE IF EXISTS supplier_products CASCADE;
 DROP TABLE IF EXISTS inventory CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
 DROP TABLE IF EXISTS categories CASCADE;
@@ -39,6 +40,19 @@ CREATE TABLE inventory (
     FOREIGN KEY (warehouse_id) REFERENCES warehouses(id)
 );
 
+-- which suppliers sell each product, and on what terms
+CREATE TABLE supplier_products (
+    supplier_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    unit_cost FLOAT NOT NULL,
+    lead_time_days INTEGER NOT NULL DEFAULT 7,
+    min_order_qty INTEGER NOT NULL DEFAULT 1,
+    pack_size INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (supplier_id, product_id),
+    FOREIGN KEY (supplier_id) REFERENCES suppliers(id),
+    FOREIGN KEY (product_id) REFERENCES products(id)
+);
+
 INSERT INTO categories (name) VALUES
 ('Electronics'),
 ('Clothing'),
@@ -111,6 +125,29 @@ INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES
 (14, 3, 30), -- Programming Guide - OK
 (15, 3, 35); -- Fiction Novel - LOW
 
+INSERT INTO supplier_products (supplier_id, product_id, unit_cost, lead_time_days, min_order_qty, pack_size) VALUES
+-- TechSupply Co (supplier_id = 1)
+(1, 1, 720.00, 10, 5, 1),
+(1, 2, 510.00, 10, 5, 1),
+(1, 3, 285.00, 10, 5, 1),
+(1, 4, 95.00, 7, 10, 5),
+-- Fashion Distributors (supplier_id = 2)
+(2, 5, 8.50, 14, 50, 25),
+(2, 6, 38.00, 14, 20, 10),
+(2, 7, 70.00, 14, 12, 6),
+-- HomeGoods Inc (supplier_id = 3)
+(3, 4, 99.00, 3, 5, 5),
+(3, 8, 52.00, 5, 6, 6),
+(3, 9, 12.00, 5, 20, 10),
+(3, 10, 95.00, 7, 4, 2),
+-- SportWorld (supplier_id = 4)
+(4, 11, 15.00, 6, 24, 12),
+(4, 12, 160.00, 10, 2, 1),
+(4, 13, 105.00, 8, 6, 2),
+-- BookSource (supplier_id = 5)
+(5, 14, 28.00, 4, 10, 10),
+(5, 15, 6.50, 4, 25, 25);
+
 -- Display summary of created data
 SELECT 'Database schema and sample data created successfully!' as status;
 
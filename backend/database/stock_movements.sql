@@ -0,0 +1,122 @@
+-- Append-only ledger of stock movements with hourly and daily rollups.
+-- Apply with: python -m database.init_db
+--
+-- Every statement that changes inventory appends its movements in one set-based
+-- INSERT from statement-level triggers (transition tables), in the same
+-- transaction as the change, and folds them into the rollups. Trend and
+-- velocity queries read the rollups; the raw ledger is kept for auditing.
+-- Bulk loads can skip the ledger with: SET LOCAL smart_ims.ledger = 'off'
+
+-- Monthly partitions (stock_movements_pYYYYMM) are created ahead of time by
+-- inventory/movements.py; the default partition only catches stragglers.
+CREATE TABLE IF NOT EXISTS stock_movements (
+    moved_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    product_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    delta INTEGER NOT NULL,
+    quantity_after INTEGER NOT NULL
+) PARTITION BY RANGE (moved_at);
+
+CREATE TABLE IF NOT EXISTS stock_movements_default PARTITION OF stock_movements DEFAULT;
+
+CREATE INDEX IF NOT EXISTS stock_movements_product_idx ON stock_movements (product_id, warehouse_id, moved_at);
+
+-- Buckets are UTC timestamps. inbound/outbound are summed positive/negative deltas.
+CREATE TABLE IF NOT EXISTS stock_movements_hourly (
+    bucket TIMESTAMP NOT NULL,
+    product_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    inbound BIGINT NOT NULL,
+    outbound BIGINT NOT NULL,
+    movements INTEGER NOT NULL,
+    closing_quantity INTEGER NOT NULL,
+    PRIMARY KEY (product_id, warehouse_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS stock_movements_hourly_bucket_idx ON stock_movements_hourly (bucket);
+
+CREATE TABLE IF NOT EXISTS stock_movements_daily (
+    bucket TIMESTAMP NOT NULL,
+    product_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    inbound BIGINT NOT NULL,
+    outbound BIGINT NOT NULL,
+    movements INTEGER NOT NULL,
+    closing_quantity INTEGER NOT NULL,
+    PRIMARY KEY (product_id, warehouse_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS stock_movements_daily_bucket_idx ON stock_movements_daily (bucket);
+
+CREATE OR REPLACE FUNCTION record_stock_movements() RETURNS trigger AS $$
+DECLARE
+    source TEXT;
+BEGIN
+    IF current_setting('smart_ims.ledger', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Net change per row, read straight from the statement's transition tables
+    IF TG_OP = 'INSERT' THEN
+        source := 'SELECT product_id, warehouse_id, quantity AS delta, quantity AS quantity_after
+                   FROM changed_rows WHERE quantity <> 0';
+    ELSIF TG_OP = 'UPDATE' THEN
+        source := 'SELECT n.product_id, n.warehouse_id, n.quantity - o.quantity AS delta, n.quantity AS quantity_after
+                   FROM new_rows n
+                   JOIN old_rows o USING (product_id, warehouse_id)
+                   WHERE n.quantity <> o.quantity';
+    ELSE
+        source := 'SELECT product_id, warehouse_id, -quantity AS delta, 0 AS quantity_after
+                   FROM changed_rows WHERE quantity <> 0';
+    END IF;
+
+    -- One statement appends to the ledger and folds the appended rows into both rollups
+    EXECUTE format($sql$
+        WITH moved AS (
+            INSERT INTO stock_movements (moved_at, product_id, warehouse_id, delta, quantity_after)
+            SELECT now(), product_id, warehouse_id, delta, quantity_after FROM (%s) AS changes
+            RETURNING product_id, warehouse_id, delta, quantity_after
+        ),
+        hourly AS (
+            INSERT INTO stock_movements_hourly AS r
+            SELECT date_trunc('hour', now() AT TIME ZONE 'UTC'), product_id, warehouse_id,
+                   sum(greatest(delta, 0)), sum(greatest(-delta, 0)), count(*), max(quantity_after)
+            FROM moved
+            GROUP BY product_id, warehouse_id
+            ON CONFLICT (product_id, warehouse_id, bucket) DO UPDATE SET
+                inbound = r.inbound + EXCLUDED.inbound,
+                outbound = r.outbound + EXCLUDED.outbound,
+                movements = r.movements + EXCLUDED.movements,
+                closing_quantity = EXCLUDED.closing_quantity
+        )
+        INSERT INTO stock_movements_daily AS r
+        SELECT date_trunc('day', now() AT TIME ZONE 'UTC'), product_id, warehouse_id,
+               sum(greatest(delta, 0)), sum(greatest(-delta, 0)), count(*), max(quantity_after)
+        FROM moved
+        GROUP BY product_id, warehouse_id
+        ON CONFLICT (product_id, warehouse_id, bucket) DO UPDATE SET
+            inbound = r.inbound + EXCLUDED.inbound,
+            outbound = r.outbound + EXCLUDED.outbound,
+            movements = r.movements + EXCLUDED.movements,
+            closing_quantity = EXCLUDED.closing_quantity
+    $sql$, source);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stock_movements_insert ON inventory;
+DROP TRIGGER IF EXISTS stock_movements_update ON inventory;
+DROP TRIGGER IF EXISTS stock_movements_delete ON inventory;
+
+CREATE TRIGGER stock_movements_insert AFTER INSERT ON inventory
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_stock_movements();
+
+CREATE TRIGGER stock_movements_update AFTER UPDATE ON inventory
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_stock_movements();
+
+CREATE TRIGGER stock_movements_delete AFTER DELETE ON inventory
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_stock_movements();
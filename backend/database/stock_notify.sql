@@ -0,0 +1,99 @@
+-- Publish inventory and product changes on the inventory_changed channel so
+-- API processes can keep their in-memory stock index current, whoever wrote.
+-- Apply with: python -m database.init_db
+--
+-- Triggers are statement-level with transition tables: small statements send
+-- one notification per row, bulk loads (COPY, large UPDATEs, TRUNCATE) send a
+-- single {"op": "RELOAD"} instead of flooding the channel.
+
+CREATE OR REPLACE FUNCTION notify_inventory_changed() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    -- TRUNCATE triggers have no transition table; keep changed_rows out of this branch
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('inventory_changed', '{"op": "RELOAD"}');
+        RETURN NULL;
+    END IF;
+
+    IF (SELECT count(*) FROM changed_rows) > 100 THEN
+        PERFORM pg_notify('inventory_changed', '{"op": "RELOAD"}');
+        RETURN NULL;
+    END IF;
+
+    FOR changed IN SELECT * FROM changed_rows LOOP
+        PERFORM pg_notify('inventory_changed', json_build_object(
+            'table', 'inventory',
+            'op', TG_OP,
+            'product_id', changed.product_id,
+            'warehouse_id', changed.warehouse_id,
+            'quantity', changed.quantity
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_product_changed() RETURNS trigger AS $$
+DECLARE
+    changed RECORD;
+BEGIN
+    -- TRUNCATE triggers have no transition table; keep changed_rows out of this branch
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('inventory_changed', '{"op": "RELOAD"}');
+        RETURN NULL;
+    END IF;
+
+    IF (SELECT count(*) FROM changed_rows) > 100 THEN
+        PERFORM pg_notify('inventory_changed', '{"op": "RELOAD"}');
+        RETURN NULL;
+    END IF;
+
+    FOR changed IN
+        SELECT r.id, r.name, c.name AS category, r.price, r.reorder_level
+        FROM changed_rows r
+        LEFT JOIN categories c ON c.id = r.category_id
+    LOOP
+        PERFORM pg_notify('inventory_changed', json_build_object(
+            'table', 'products',
+            'op', TG_OP,
+            'id', changed.id,
+            'name', changed.name,
+            'category', changed.category,
+            'price', changed.price,
+            'reorder_level', changed.reorder_level
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS inventory_changed_insert ON inventory;
+DROP TRIGGER IF EXISTS inventory_changed_update ON inventory;
+DROP TRIGGER IF EXISTS inventory_changed_delete ON inventory;
+DROP TRIGGER IF EXISTS inventory_changed_truncate ON inventory;
+DROP TRIGGER IF EXISTS product_changed_insert ON products;
+DROP TRIGGER IF EXISTS product_changed_update ON products;
+
+CREATE TRIGGER inventory_changed_insert AFTER INSERT ON inventory
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_inventory_changed();
+
+CREATE TRIGGER inventory_changed_update AFTER UPDATE ON inventory
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_inventory_changed();
+
+CREATE TRIGGER inventory_changed_delete AFTER DELETE ON inventory
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_inventory_changed();
+
+CREATE TRIGGER inventory_changed_truncate AFTER TRUNCATE ON inventory
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_inventory_changed();
+
+CREATE TRIGGER product_changed_insert AFTER INSERT ON products
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_product_changed();
+
+CREATE TRIGGER product_changed_update AFTER UPDATE ON products
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_product_changed();
@@ -0,0 +1,143 @@
+import datetime
+import logging
+import os
+import re
+import threading
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Monthly ledger partitions created ahead of the current month
+STOCK_MOVEMENT_MONTHS_AHEAD = int(os.getenv('STOCK_MOVEMENT_MONTHS_AHEAD', '3'))
+# Raw ledger partitions older than this many months are dropped (rollups are kept); 0 keeps everything
+STOCK_MOVEMENT_RETENTION_MONTHS = int(os.getenv('STOCK_MOVEMENT_RETENTION_MONTHS', '0'))
+# Hours between partition maintenance runs in the API process
+STOCK_MOVEMENT_MAINTENANCE_HOURS = float(os.getenv('STOCK_MOVEMENT_MAINTENANCE_HOURS', '24'))
+
+PARTITION_NAME = re.compile(r"^stock_movements_p(\d{4})(\d{2})$")
+
+def _add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: datetime.date) -> str:
+    return f"stock_movements_p{month:%Y%m}"
+
+def ensure_partitions(conn, months_ahead: int = STOCK_MOVEMENT_MONTHS_AHEAD,
+                      retention_months: int = STOCK_MOVEMENT_RETENTION_MONTHS) -> List[str]:
+    """
+    Create the monthly ledger partitions from the current month up to
+    months_ahead, and drop expired ones. Returns the partitions created.
+    Rows that already landed in the default partition for a new month are
+    moved into it, since Postgres refuses the partition while they remain.
+
+    Args:
+        conn: An open psycopg2 connection to the primary
+        months_ahead: Number of future months to create
+        retention_months: Drop partitions that ended more than this many months ago; 0 keeps all
+    """
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    current = today.replace(day=1)
+    created = []
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'stock_movements'::regclass
+        """)
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            lower = f"{month:%Y-%m-%d} 00:00+00"
+            upper = f"{_add_months(month, 1):%Y-%m-%d} 00:00+00"
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM stock_movements_default WHERE moved_at >= %s AND moved_at < %s)",
+                (lower, upper),
+            )
+            if cursor.fetchone()[0]:
+                _create_from_default(cursor, name, lower, upper)
+            else:
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF stock_movements FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                )
+            created.append(name)
+
+        if retention_months:
+            cutoff = _add_months(current, -retention_months)
+            for name in sorted(existing):
+                match = PARTITION_NAME.match(name)
+                if match and _add_months(datetime.date(int(match.group(1)), int(match.group(2)), 1), 1) <= cutoff:
+                    cursor.execute(f"DROP TABLE {name}")
+                    logger.info(f"Dropped expired stock movement partition {name}")
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if created:
+        logger.info(f"Created stock movement partitions: {', '.join(created)}")
+    return created
+
+def _create_from_default(cursor, name: str, lower: str, upper: str):
+    """
+    Create a partition whose range already has rows in the default partition:
+    detach the default, create the partition, move the rows across and
+    re-attach the default, all in the caller's transaction.
+    """
+    cursor.execute("ALTER TABLE stock_movements DETACH PARTITION stock_movements_default")
+    cursor.execute(
+        f"CREATE TABLE {name} PARTITION OF stock_movements FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+    cursor.execute(
+        f"INSERT INTO {name} (moved_at, product_id, warehouse_id, delta, quantity_after) "
+        "SELECT moved_at, product_id, warehouse_id, delta, quantity_after FROM stock_movements_default "
+        "WHERE moved_at >= %s AND moved_at < %s",
+        (lower, upper),
+    )
+    moved = cursor.rowcount
+    cursor.execute("DELETE FROM stock_movements_default WHERE moved_at >= %s AND moved_at < %s", (lower, upper))
+    cursor.execute("ALTER TABLE stock_movements ATTACH PARTITION stock_movements_default DEFAULT")
+    logger.info(f"Moved {moved} stock movements from the default partition into {name}")
+
+class PartitionMaintainer:
+    """Runs ensure_partitions on startup and then periodically, in a daemon thread"""
+
+    def __init__(self, connect, interval_hours: float = STOCK_MOVEMENT_MAINTENANCE_HOURS):
+        self.connect = connect
+        self.interval = interval_hours * 3600
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stock-movement-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                ensure_partitions(conn)
+            except Exception as e:
+                logger.warning(f"Stock movement partition maintenance failed: {e}")
+            finally:
+                if conn:
+                    conn.close()
+            self._stop.wait(self.interval)
@@ -0,0 +1,293 @@
+"""
+Reorder planning: suggested order quantity, supplier and cost for every
+stocked (product, warehouse) pair, computed with numpy array operations over
+data pulled from PostgreSQL in bulk with COPY.
+"""
+import io
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Order up to this multiple of the reorder level, plus expected demand until the next review
+REORDER_TARGET_MULTIPLIER = float(os.getenv('REORDER_TARGET_MULTIPLIER', '2.0'))
+# Days between ordering runs that an order has to cover
+REORDER_REVIEW_DAYS = float(os.getenv('REORDER_REVIEW_DAYS', '7'))
+# Days of stock movement rollups used to estimate daily demand
+REORDER_DEMAND_DAYS = int(os.getenv('REORDER_DEMAND_DAYS', '28'))
+# Lead time assumed for products without a supplier offer
+REORDER_DEFAULT_LEAD_TIME_DAYS = float(os.getenv('REORDER_DEFAULT_LEAD_TIME_DAYS', '7'))
+
+PAIRS_SQL = """
+SELECT i.product_id, i.warehouse_id, i.quantity, p.reorder_level, p.price
+FROM inventory i
+JOIN products p ON p.id = i.product_id
+{where_clause}
+"""
+OFFERS_SQL = """
+SELECT product_id, supplier_id, unit_cost, lead_time_days, min_order_qty, pack_size
+FROM supplier_products
+"""
+DEMAND_SQL = """
+SELECT product_id, warehouse_id, SUM(outbound)::float / {days}
+FROM stock_movements_daily
+WHERE bucket >= date_trunc('day', now() AT TIME ZONE 'UTC') - make_interval(days => {days})
+{where_clause}
+GROUP BY product_id, warehouse_id
+"""
+
+PLAN_COLUMNS = ["product_id", "product_name", "warehouse_id", "warehouse", "current_stock", "reorder_level",
+                "daily_demand", "days_of_cover", "supplier_id", "supplier", "lead_time_days",
+                "order_quantity", "unit_cost", "order_cost"]
+
+@dataclass
+class ReorderInputs:
+    """Parallel arrays: one entry per stocked pair, one per supplier offer"""
+    product_ids: np.ndarray
+    warehouse_ids: np.ndarray
+    quantities: np.ndarray
+    reorder_levels: np.ndarray
+    prices: np.ndarray
+    demand: np.ndarray
+    offer_product_ids: np.ndarray
+    offer_supplier_ids: np.ndarray
+    offer_unit_costs: np.ndarray
+    offer_lead_times: np.ndarray
+    offer_min_qty: np.ndarray
+    offer_pack_sizes: np.ndarray
+
+    def __len__(self):
+        return len(self.product_ids)
+
+def _copy_columns(cursor, sql: str, columns: int) -> List[np.ndarray]:
+    """Run COPY (sql) TO STDOUT and parse the CSV into one float64 array per column"""
+    buffer = io.BytesIO()
+    cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", buffer)
+    if not buffer.tell():
+        return [np.empty(0) for _ in range(columns)]
+    buffer.seek(0)
+    data = np.loadtxt(buffer, delimiter=",", dtype=np.float64, ndmin=2)
+    return [data[:, index] for index in range(columns)]
+
+def _pair_keys(product_ids: np.ndarray, warehouse_ids: np.ndarray) -> np.ndarray:
+    return product_ids.astype(np.int64) << 32 | warehouse_ids.astype(np.int64)
+
+def load_inputs(conn, warehouse_id: Optional[int] = None, demand_days: int = REORDER_DEMAND_DAYS) -> ReorderInputs:
+    """
+    Pull stock, reorder levels, prices, supplier offers and recent demand in bulk.
+
+    Args:
+        conn: An open psycopg2 connection
+        warehouse_id: Optional warehouse ID to plan for
+        demand_days: Days of daily rollups averaged into the demand estimate
+    """
+    cursor = conn.cursor()
+    try:
+        where_clause = cursor.mogrify("WHERE i.warehouse_id = %s", (warehouse_id,)).decode() if warehouse_id else ""
+        product_ids, warehouse_ids, quantities, reorder_levels, prices = _copy_columns(
+            cursor, PAIRS_SQL.format(where_clause=where_clause), 5)
+        offers = _copy_columns(cursor, OFFERS_SQL, 6)
+
+        demand = np.zeros(len(product_ids))
+        cursor.execute("SELECT to_regclass('stock_movements_daily')")
+        if cursor.fetchone()[0] and len(product_ids):
+            demand_where = cursor.mogrify("AND warehouse_id = %s", (warehouse_id,)).decode() if warehouse_id else ""
+            demand_products, demand_warehouses, daily = _copy_columns(
+                cursor, DEMAND_SQL.format(days=int(demand_days), where_clause=demand_where), 3)
+            demand = _lookup(_pair_keys(product_ids, warehouse_ids),
+                             _pair_keys(demand_products, demand_warehouses), daily, 0.0)
+    finally:
+        cursor.close()
+
+    return ReorderInputs(product_ids.astype(np.int64), warehouse_ids.astype(np.int64), quantities,
+                         reorder_levels, prices, demand, offers[0].astype(np.int64), offers[1].astype(np.int64),
+                         *offers[2:])
+
+def _lookup(keys: np.ndarray, table_keys: np.ndarray, values: np.ndarray, default) -> np.ndarray:
+    """values[table_keys == key] for each key, or default where the key is missing"""
+    result = np.full(len(keys), default, dtype=np.result_type(values, type(default)))
+    if not len(table_keys):
+        return result
+    order = np.argsort(table_keys, kind="stable")
+    sorted_keys = table_keys[order]
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    found = sorted_keys[positions] == keys
+    result[found] = values[order[positions[found]]]
+    return result
+
+def best_offers(inputs: ReorderInputs) -> Tuple[np.ndarray, ...]:
+    """
+    Cheapest offer per pair (shortest lead time on ties).
+    Pairs without an offer get supplier 0, the list price and the default lead time.
+    Returns supplier ids, unit costs, lead times, minimum quantities and pack sizes.
+    """
+    pairs = len(inputs)
+    if not len(inputs.offer_product_ids):
+        return (np.zeros(pairs, dtype=np.int64), inputs.prices.copy(), np.full(pairs, REORDER_DEFAULT_LEAD_TIME_DAYS),
+                np.ones(pairs), np.ones(pairs))
+
+    # Sort offers by product, then cost, then lead time; the first of each product wins
+    order = np.lexsort((inputs.offer_lead_times, inputs.offer_unit_costs, inputs.offer_product_ids))
+    sorted_products = inputs.offer_product_ids[order]
+    is_first = np.empty(len(order), dtype=bool)
+    is_first[0] = True
+    np.not_equal(sorted_products[1:], sorted_products[:-1], out=is_first[1:])
+    products = sorted_products[is_first]
+    winners = order[is_first]
+
+    # Map every pair to its product's winning offer, or to -1: a direct table when
+    # product ids are dense (SERIAL keys), a binary search otherwise
+    max_id = int(max(products[-1], inputs.product_ids.max(initial=0)))
+    if max_id <= 4 * (len(products) + pairs):
+        table = np.full(max_id + 1, -1, dtype=np.int64)
+        table[products] = winners
+        chosen = table[inputs.product_ids]
+    else:
+        positions = np.minimum(np.searchsorted(products, inputs.product_ids), len(products) - 1)
+        chosen = np.where(products[positions] == inputs.product_ids, winners[positions], -1)
+
+    # Index -1 selects the appended default offer
+    def column(values: np.ndarray, default) -> np.ndarray:
+        return np.append(values, default)[chosen]
+
+    unit_costs = column(inputs.offer_unit_costs, np.nan)
+    unit_costs = np.where(chosen >= 0, unit_costs, inputs.prices)
+    return (column(inputs.offer_supplier_ids, 0), unit_costs,
+            column(inputs.offer_lead_times, REORDER_DEFAULT_LEAD_TIME_DAYS),
+            column(np.maximum(inputs.offer_min_qty, 1), 1.0), column(np.maximum(inputs.offer_pack_sizes, 1), 1.0))
+
+def compute_plan(inputs: ReorderInputs, target_multiplier: float = REORDER_TARGET_MULTIPLIER,
+                 review_days: float = REORDER_REVIEW_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Suggested order per pair. A pair is reordered when the stock expected to
+    remain once a new order would arrive is at or below the reorder level
+    (with no demand history this is the low-stock rule). It is then ordered up to
+    target_multiplier x reorder level plus demand over the lead time and review
+    period, rounded up to the supplier's minimum quantity and pack size.
+
+    Args:
+        inputs: Bulk-loaded arrays
+        target_multiplier: Order-up-to level as a multiple of the reorder level
+        review_days: Days until the next ordering run
+    """
+    supplier_ids, unit_costs, lead_times, min_qty, pack_sizes = best_offers(inputs)
+    quantities = inputs.quantities
+    demand = inputs.demand
+
+    projected = quantities - demand * lead_times
+    needs_order = projected <= inputs.reorder_levels
+
+    # order = ceil(max(ceil(target - projected), min_qty) / pack) * pack, in place to avoid temporaries
+    order_quantity = lead_times + review_days
+    order_quantity *= demand
+    order_quantity += inputs.reorder_levels * target_multiplier
+    order_quantity -= projected
+    np.ceil(order_quantity, out=order_quantity)
+    np.maximum(order_quantity, min_qty, out=order_quantity)
+    order_quantity /= pack_sizes
+    np.ceil(order_quantity, out=order_quantity)
+    order_quantity *= pack_sizes
+    order_quantity[~needs_order] = 0
+
+    days_of_cover = np.divide(quantities, demand, out=np.full(len(quantities), np.inf), where=demand > 0)
+
+    return {
+        "needs_order": needs_order,
+        "order_quantity": order_quantity,
+        "order_cost": order_quantity * unit_costs,
+        "supplier_ids": supplier_ids,
+        "unit_costs": unit_costs,
+        "lead_times": lead_times,
+        "days_of_cover": days_of_cover,
+    }
+
+def summarize(inputs: ReorderInputs, plan: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Totals overall and per supplier"""
+    needs_order = plan["needs_order"]
+    suppliers, inverse = np.unique(plan["supplier_ids"][needs_order], return_inverse=True)
+    units = np.bincount(inverse, weights=plan["order_quantity"][needs_order], minlength=len(suppliers))
+    costs = np.bincount(inverse, weights=plan["order_cost"][needs_order], minlength=len(suppliers))
+    lines = np.bincount(inverse, minlength=len(suppliers))
+
+    return {
+        "pairs_evaluated": len(inputs),
+        "pairs_to_reorder": int(needs_order.sum()),
+        "total_units": int(plan["order_quantity"].sum()),
+        "total_cost": round(float(plan["order_cost"].sum()), 2),
+        "by_supplier": [
+            {"supplier_id": int(supplier) or None, "lines": int(count), "units": int(unit), "cost": round(float(cost), 2)}
+            for supplier, count, unit, cost in zip(suppliers, lines, units, costs)
+        ],
+    }
+
+def top_orders(inputs: ReorderInputs, plan: Dict[str, np.ndarray], limit: Optional[int]) -> np.ndarray:
+    """Indexes of pairs to reorder, most urgent first: fewest days of cover, then largest shortfall"""
+    candidates = np.flatnonzero(plan["needs_order"])
+    shortfall = inputs.reorder_levels[candidates] - inputs.quantities[candidates]
+    order = np.lexsort((-shortfall, plan["days_of_cover"][candidates]))
+    return candidates[order[:limit] if limit else order]
+
+def plan_rows(conn, inputs: ReorderInputs, plan: Dict[str, np.ndarray], indexes: np.ndarray) -> List[tuple]:
+    """Rows in PLAN_COLUMNS order for the selected pairs, with names looked up for those pairs only"""
+    product_ids = inputs.product_ids[indexes]
+    warehouse_ids = inputs.warehouse_ids[indexes]
+    supplier_ids = plan["supplier_ids"][indexes]
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id, name FROM products WHERE id = ANY(%s)", (np.unique(product_ids).tolist(),))
+        product_names = dict(cursor.fetchall())
+        cursor.execute("SELECT id, location FROM warehouses WHERE id = ANY(%s)", (np.unique(warehouse_ids).tolist(),))
+        locations = dict(cursor.fetchall())
+        cursor.execute("SELECT id, name FROM suppliers WHERE id = ANY(%s)", (np.unique(supplier_ids).tolist(),))
+        supplier_names = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+    columns = zip(
+        product_ids.tolist(),
+        warehouse_ids.tolist(),
+        inputs.quantities[indexes].astype(np.int64).tolist(),
+        inputs.reorder_levels[indexes].astype(np.int64).tolist(),
+        np.round(inputs.demand[indexes], 2).tolist(),
+        [None if np.isinf(cover) else round(float(cover), 1) for cover in plan["days_of_cover"][indexes]],
+        supplier_ids.tolist(),
+        plan["lead_times"][indexes].astype(np.int64).tolist(),
+        plan["order_quantity"][indexes].astype(np.int64).tolist(),
+        np.round(plan["unit_costs"][indexes], 2).tolist(),
+        np.round(plan["order_cost"][indexes], 2).tolist(),
+    )
+    return [
+        (product_id, product_names.get(product_id), warehouse_id, locations.get(warehouse_id), stock, level,
+         demand, cover, supplier_id or None, supplier_names.get(supplier_id),
+         lead_time, quantity, unit_cost, cost)
+        for product_id, warehouse_id, stock, level, demand, cover, supplier_id, lead_time, quantity, unit_cost, cost
+        in columns
+    ]
+
+def reorder_plan(conn, warehouse_id: Optional[int] = None, limit: Optional[int] = 100) -> Dict[str, Any]:
+    """
+    Load, compute and format a reorder plan.
+    Returns the summary, column names and the most urgent rows.
+
+    Args:
+        conn: An open psycopg2 connection
+        warehouse_id: Optional warehouse ID to plan for
+        limit: Maximum number of order lines to return; None returns all
+    """
+    start = time.perf_counter()
+    inputs = load_inputs(conn, warehouse_id)
+    loaded = time.perf_counter()
+    plan = compute_plan(inputs)
+    summary = summarize(inputs, plan)
+    computed = time.perf_counter()
+    rows = plan_rows(conn, inputs, plan, top_orders(inputs, plan, limit))
+
+    summary["load_ms"] = round((loaded - start) * 1000, 1)
+    summary["compute_ms"] = round((computed - loaded) * 1000, 1)
+    return {"summary": summary, "columns": PLAN_COLUMNS, "rows": rows}
@@ -0,0 +1,348 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Channel the inventory triggers in database/stock_notify.sql publish to
+STOCK_NOTIFY_CHANNEL = os.getenv('STOCK_NOTIFY_CHANNEL', 'inventory_changed').strip('"\'')
+# Events buffered per alert subscriber before the oldest are dropped
+STOCK_EVENT_QUEUE_SIZE = int(os.getenv('STOCK_EVENT_QUEUE_SIZE', '1000'))
+
+INDEX_SQL = """
+SELECT i.product_id, i.warehouse_id, i.quantity, p.reorder_level
+FROM inventory i
+JOIN products p ON p.id = i.product_id
+"""
+PRODUCTS_SQL = """
+SELECT p.id, p.name, c.name, p.price, p.reorder_level
+FROM products p
+LEFT JOIN categories c ON c.id = p.category_id
+"""
+WAREHOUSES_SQL = "SELECT id, location FROM warehouses"
+
+class StockEvents:
+    """
+    Fan-out of stock alerts to asyncio subscribers (the SSE stream).
+    publish() may be called from any thread.
+    """
+
+    def __init__(self, queue_size: int = STOCK_EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a queue on the running event loop"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {entry for entry in self._subscribers if entry[1] is not queue}
+
+    def publish(self, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Loop already closed
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            # Slow consumer: drop the oldest event rather than block writers
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+class StockIndex:
+    """
+    In-process index of stock levels keyed by (product, warehouse).
+
+    Quantities and reorder levels live in parallel typed arrays addressed by
+    slot; dicts map keys, products and warehouses to slots, and the set of
+    slots at or below their reorder level is maintained on every update, so
+    low-stock and per-warehouse lookups never scan the whole index.
+    Slots of deleted rows are recycled by later inserts.
+    Crossing a reorder threshold in either direction publishes an event.
+    """
+
+    def __init__(self, events: Optional[StockEvents] = None):
+        self.events = events or StockEvents()
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.product_ids = array("i")
+        self.warehouse_ids = array("i")
+        self.quantities = array("q")
+        self.reorder_levels = array("i")
+        self.slots: Dict[Tuple[int, int], int] = {}
+        self.product_slots: Dict[int, List[int]] = {}
+        self.warehouse_slots: Dict[int, List[int]] = {}
+        self.low_slots: Set[int] = set()
+        self.free_slots: List[int] = []
+        # Display attributes for API responses
+        self.products: Dict[int, Tuple[str, Optional[str], float, int]] = {}
+        self.warehouses: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.slots)
+
+    def load(self, conn):
+        """
+        (Re)build the index from the database in bulk.
+
+        Args:
+            conn: An open psycopg2 connection
+        """
+        start = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute(PRODUCTS_SQL)
+            products = {row[0]: (row[1], row[2], row[3], row[4]) for row in cursor}
+            cursor.execute(WAREHOUSES_SQL)
+            warehouses = dict(cursor.fetchall())
+            cursor.execute(INDEX_SQL)
+            rows = cursor.fetchall()
+        conn.rollback()
+
+        with self._lock:
+            self._reset()
+            self.products = products
+            self.warehouses = warehouses
+            for product_id, warehouse_id, quantity, reorder_level in rows:
+                self._insert(product_id, warehouse_id, quantity, reorder_level)
+            self.loaded = True
+            self.loaded_at = time.time()
+
+        logger.info(f"Stock index loaded: {len(rows)} entries in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def _insert(self, product_id: int, warehouse_id: int, quantity: int, reorder_level: int) -> int:
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.product_ids[slot] = product_id
+            self.warehouse_ids[slot] = warehouse_id
+            self.quantities[slot] = quantity
+            self.reorder_levels[slot] = reorder_level
+        else:
+            slot = len(self.product_ids)
+            self.product_ids.append(product_id)
+            self.warehouse_ids.append(warehouse_id)
+            self.quantities.append(quantity)
+            self.reorder_levels.append(reorder_level)
+        self.slots[(product_id, warehouse_id)] = slot
+        self.product_slots.setdefault(product_id, []).append(slot)
+        self.warehouse_slots.setdefault(warehouse_id, []).append(slot)
+        if quantity <= reorder_level:
+            self.low_slots.add(slot)
+        return slot
+
+    def _reorder_level_for(self, product_id: int) -> Optional[int]:
+        product = self.products.get(product_id)
+        if product is not None:
+            return product[3]
+        slots = self.product_slots.get(product_id)
+        return self.reorder_levels[slots[0]] if slots else None
+
+    def set_quantity(self, product_id: int, warehouse_id: int, quantity: int):
+        """
+        Record the current quantity of a (product, warehouse) pair.
+        Idempotent, so the same change arriving by write and by NOTIFY is harmless.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            slot = self.slots.get((product_id, warehouse_id))
+            if slot is None:
+                reorder_level = self._reorder_level_for(product_id)
+                if reorder_level is None:
+                    # Product not known yet; picked up on the next reload
+                    return
+                slot = self._insert(product_id, warehouse_id, quantity, reorder_level)
+                was_low = False
+            else:
+                was_low = slot in self.low_slots
+                self.quantities[slot] = quantity
+            self._update_low(slot, was_low)
+
+    def remove(self, product_id: int, warehouse_id: int):
+        """
+        Drop a deleted (product, warehouse) pair and free its slot.
+        Unknown pairs are ignored; no alert is published for a deletion.
+        """
+        with self._lock:
+            slot = self.slots.pop((product_id, warehouse_id), None)
+            if slot is None:
+                return
+            for lookup, key in ((self.product_slots, product_id), (self.warehouse_slots, warehouse_id)):
+                slots = lookup[key]
+                slots.remove(slot)
+                if not slots:
+                    del lookup[key]
+            self.low_slots.discard(slot)
+            self.free_slots.append(slot)
+
+    def set_reorder_level(self, product_id: int, reorder_level: int):
+        """Apply a changed reorder level to every warehouse holding the product"""
+        with self._lock:
+            product = self.products.get(product_id)
+            if product is not None:
+                self.products[product_id] = product[:3] + (reorder_level,)
+            for slot in self.product_slots.get(product_id, []):
+                was_low = slot in self.low_slots
+                self.reorder_levels[slot] = reorder_level
+                self._update_low(slot, was_low)
+
+    def update_product(self, product_id: int, name: str, category: Optional[str], price: float, reorder_level: int):
+        with self._lock:
+            self.products[product_id] = (name, category, price, reorder_level)
+        self.set_reorder_level(product_id, reorder_level)
+
+    def _update_low(self, slot: int, was_low: bool):
+        is_low = self.quantities[slot] <= self.reorder_levels[slot]
+        if is_low == was_low:
+            return
+        if is_low:
+            self.low_slots.add(slot)
+        else:
+            self.low_slots.discard(slot)
+        self.events.publish({
+            "event": "low_stock" if is_low else "restocked",
+            "at": time.time(),
+            "warehouse_id": self.warehouse_ids[slot],
+            **self._entry(slot),
+        })
+
+    def _entry(self, slot: int) -> Dict[str, Any]:
+        """One entry in the column layout of the SQL fallback queries"""
+        product_id = self.product_ids[slot]
+        name, category, price, _ = self.products.get(product_id, (None, None, None, None))
+        return {
+            "product_id": product_id,
+            "product_name": name,
+            "category": category,
+            "reorder_level": self.reorder_levels[slot],
+            "current_stock": self.quantities[slot],
+            "warehouse": self.warehouses.get(self.warehouse_ids[slot]),
+            "price": price,
+        }
+
+    def _listed(self, slot: int) -> bool:
+        """Whether the SQL queries would return the slot: they inner join categories and warehouses"""
+        product = self.products.get(self.product_ids[slot])
+        return product is not None and product[1] is not None and self.warehouse_ids[slot] in self.warehouses
+
+    def low_stock(self, warehouse_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Entries at or below their reorder level, largest shortfall first,
+        in the same shape as the get_low_stock_items tool.
+
+        Args:
+            warehouse_id: Optional warehouse ID to filter by
+        """
+        with self._lock:
+            slots = [slot for slot in self.low_slots
+                     if (warehouse_id is None or self.warehouse_ids[slot] == warehouse_id) and self._listed(slot)]
+            slots.sort(key=lambda slot: self.reorder_levels[slot] - self.quantities[slot], reverse=True)
+            return [self._entry(slot) for slot in slots]
+
+    def warehouse_stock(self, warehouse_id: int) -> List[Dict[str, Any]]:
+        """Every indexed entry for one warehouse, in the same shape as the get_warehouse_stock tool"""
+        with self._lock:
+            return [self._entry(slot) for slot in self.warehouse_slots.get(warehouse_id, []) if self._listed(slot)]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "loaded_at": self.loaded_at,
+            "entries": len(self.slots),
+            "low_stock_entries": len(self.low_slots),
+        }
+
+class StockListener:
+    """
+    Background LISTEN on the inventory channel so changes made by other
+    writers (raw SQL, other processes) reach the index.
+    """
+
+    def __init__(self, index: StockIndex, connect, channel: str = STOCK_NOTIFY_CHANNEL):
+        self.index = index
+        self.connect = connect
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stock-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                # Reload after (re)subscribing so nothing missed while disconnected is lost
+                self.index.load(conn)
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    reload = False
+                    while conn.notifies:
+                        reload = self.handle(conn.notifies.pop(0).payload) or reload
+                    if reload:
+                        self.index.load(conn)
+            except Exception as e:
+                logger.warning(f"Stock listener error, reconnecting: {e}")
+                self._stop.wait(5)
+            finally:
+                if conn:
+                    conn.close()
+
+    def handle(self, payload: str) -> bool:
+        """
+        Apply one notification from the triggers in database/stock_notify.sql.
+        Returns True when the writer asked for a full reload (bulk changes).
+        """
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed stock notification: {payload[:200]}")
+            return False
+
+        if change.get("op") == "RELOAD":
+            return True
+        if change.get("table") == "products":
+            self.index.update_product(change["id"], change["name"], change.get("category"),
+                                      change["price"], change["reorder_level"])
+        elif change.get("op") == "DELETE":
+            self.index.remove(change["product_id"], change["warehouse_id"])
+        else:
+            self.index.set_quantity(change["product_id"], change["warehouse_id"], change["quantity"])
+        return False
+
+# Global stock index instance
+stock_index = StockIndex()
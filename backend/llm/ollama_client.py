@@ -1,7 +1,13 @@
 import requests
 import json
 import logging
+import os
 from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+from llm.sql_validator import validate_sql
+from monitoring.metrics import span, record_llm_generation
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +38,9 @@ DATABASE SCHEMA:
 - warehouses (id, location) - Warehouse locations  
 - inventory (product_id, warehouse_id, quantity) - Current stock levels
 - suppliers (id, name, contact) - Supplier information
+- supplier_products (supplier_id, product_id, unit_cost, lead_time_days, min_order_qty, pack_size) - Supplier terms per product
+- stock_movements (moved_at, product_id, warehouse_id, delta, quantity_after) - Raw ledger of every stock change
+- stock_movements_daily / stock_movements_hourly (bucket, product_id, warehouse_id, inbound, outbound, movements, closing_quantity) - Units in/out per day or hour
 
 RULES:
 1. Always return valid PostgreSQL SQL only
@@ -39,7 +48,8 @@ RULES:
 3. For adding inventory: Use INSERT ... ON CONFLICT DO UPDATE
 4. For queries about stock: JOIN products, inventory, warehouses
 5. For low stock: WHERE inventory.quantity <= products.reorder_level
-6. Return only the SQL query, no explanations
+6. For sales, velocity or trends over time: use stock_movements_daily (or _hourly), filtering on bucket, not stock_movements
+7. Return only the SQL query, no explanations
 
 EXAMPLES:
 User: "Add 50 laptops to warehouse 1"
@@ -51,6 +61,9 @@ SQL: SELECT p.name, c.name as category, i.quantity, p.reorder_level, w.location
 User: "What's the total value of electronics inventory?"
 SQL: SELECT SUM(i.quantity * p.price) as total_value FROM inventory i JOIN products p ON i.product_id = p.id JOIN categories c ON p.category_id = c.id WHERE c.name ILIKE '%electronics%';
 
+User: "What were the 5 best selling products in the last 7 days?"
+SQL: SELECT p.name, SUM(d.outbound) as units_sold FROM stock_movements_daily d JOIN products p ON d.product_id = p.id WHERE d.bucket >= now() - interval '7 days' GROUP BY p.name ORDER BY units_sold DESC LIMIT 5;
+
 Now convert the user's request to SQL:"""
 
     async def text_to_sql(self, user_input: str) -> str:
@@ -64,7 +77,9 @@ Now convert the user's request to SQL:"""
             Generated SQL query
         """
         try:
-            if not self.is_available():
+            with span("ollama.probe"):
+                available = self.is_available()
+            if not available:
                 return f"-- Error: Ollama service not available\n-- Original request: {user_input}"
             
             # Prepare the prompt
@@ -83,21 +98,33 @@ Now convert the user's request to SQL:"""
                 }
             }
             
-            response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=30
-            )
+            with span("ollama.generate"):
+                response = self.session.post(
+                    f"{self.base_url}/api/generate",
+                    json=payload,
+                    timeout=30
+                )
             
             if response.status_code != 200:
                 logger.error(f"Ollama API error: {response.status_code} - {response.text}")
                 return f"-- Error: Ollama API returned {response.status_code}\n-- Original request: {user_input}"
             
             result = response.json()
+            record_llm_generation(result.get("eval_count"), result.get("eval_duration"))
             generated_sql = result.get("response", "").strip()
             
             # Clean up the generated SQL
-            generated_sql = self._clean_sql(generated_sql)
+            with span("ollama.clean_sql"):
+                generated_sql = self._clean_sql(generated_sql)
+            
+            # Parse and check against the schema so bad generations fail before reaching Postgres
+            with span("sql.validate"):
+                validation = validate_sql(generated_sql)
+            if not validation.valid:
+                logger.warning(f"Rejected generated SQL for '{user_input}': {validation.error}")
+                return f"-- Error: Generated SQL failed validation: {validation.error}\n-- SQL: {generated_sql}\n-- Original request: {user_input}"
+            
+            generated_sql = validation.canonical
             
             logger.info(f"Generated SQL for '{user_input}': {generated_sql}")
             return generated_sql
@@ -131,4 +158,7 @@ Now convert the user's request to SQL:"""
         return cleaned_sql
 
 # Global Ollama client instance
-ollama_client = OllamaClient() 
\ No newline at end of file
+ollama_client = OllamaClient(
+    base_url=os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434').strip('"\''),
+    model=os.getenv('OLLAMA_MODEL', 'gemma3:latest').strip('"\'')
+) 
\ No newline at end of file
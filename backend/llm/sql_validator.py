@@ -0,0 +1,171 @@
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Number of distinct SQL strings whose parse results are kept
+SQL_PARSE_CACHE_SIZE = int(os.getenv('SQL_PARSE_CACHE_SIZE', '1024'))
+
+# Qualifiers that never refer to a user table
+_PSEUDO_TABLES = {"excluded", "new", "old"}
+
+@dataclass(frozen=True)
+class SQLValidationResult:
+    """Outcome of parsing and checking one SQL statement"""
+    valid: bool
+    sql: str
+    canonical: Optional[str] = None
+    kind: Optional[str] = None
+    read_only: bool = False
+    tables: FrozenSet[str] = field(default_factory=frozenset)
+    error: Optional[str] = None
+
+_schema: Optional[Dict[str, FrozenSet[str]]] = None
+
+def known_schema() -> Dict[str, FrozenSet[str]]:
+    """
+    Table -> column names, taken from the get_database_schema tool.
+    Loaded once and reused.
+    """
+    global _schema
+    if _schema is None:
+        # Import here to avoid circular imports
+        from mcp_system.mcp_server import get_database_schema
+        tables = get_database_schema()["tables"]
+        _schema = {
+            name.lower(): frozenset(re.match(r"\w+", column).group(0).lower() for column in info["columns"])
+            for name, info in tables.items()
+        }
+    return _schema
+
+def _check_references(statement: exp.Expression, schema: Dict[str, FrozenSet[str]]) -> FrozenSet[str]:
+    """
+    Check that every table and column the statement references exists.
+    Returns the referenced schema tables; raises ValueError otherwise.
+    """
+    cte_names = frozenset(cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE))
+    derived_aliases = {
+        node.alias.lower() for node in statement.find_all(exp.Subquery, exp.Values) if node.alias
+    }
+
+    # alias or table name -> table name, for every real table
+    aliases: Dict[str, str] = {}
+    tables = set()
+    for table in statement.find_all(exp.Table):
+        name = table.name.lower()
+        if not name or name in cte_names:
+            continue
+        if table.db or name not in schema:
+            raise ValueError(f"Unknown table: {table.sql(dialect='postgres')}")
+        tables.add(name)
+        aliases[name] = name
+        aliases[table.alias_or_name.lower()] = name
+
+    output_aliases = {alias.alias.lower() for alias in statement.find_all(exp.Alias)}
+    lenient = bool(cte_names or derived_aliases)
+    visible_columns = set().union(*(schema[name] for name in tables)) if tables else set()
+
+    for column in statement.find_all(exp.Column):
+        name = column.name.lower()
+        if not name or name == "*":
+            continue
+        qualifier = column.table.lower()
+        if qualifier:
+            if qualifier in _PSEUDO_TABLES or qualifier in cte_names or qualifier in derived_aliases:
+                continue
+            if qualifier not in aliases:
+                raise ValueError(f"Unknown table or alias: {column.table}")
+            if name not in schema[aliases[qualifier]]:
+                raise ValueError(f"Unknown column: {column.table}.{column.name}")
+        elif name not in visible_columns and name not in output_aliases and not lenient:
+            raise ValueError(f"Unknown column: {column.name}")
+
+    _check_using(statement, schema, cte_names)
+    return frozenset(tables)
+
+def _check_using(statement: exp.Expression, schema: Dict[str, FrozenSet[str]], cte_names: FrozenSet[str]):
+    """
+    Check that every JOIN ... USING column exists on both sides of the join.
+    Sides that include a CTE or subquery are not checked.
+    """
+    def has_column(sources, name: str) -> bool:
+        names = [source.name.lower() for source in sources if isinstance(source, exp.Table)]
+        if len(names) != len(sources) or any(table in cte_names for table in names):
+            return True
+        return any(name in schema[table] for table in names)
+
+    for select in statement.find_all(exp.Select):
+        from_clause = select.args.get("from_")
+        sources = [from_clause.this] if from_clause else []
+        for join in select.args.get("joins") or []:
+            for identifier in join.args.get("using") or []:
+                name = identifier.name.lower()
+                if not has_column(sources, name) or not has_column([join.this], name):
+                    raise ValueError(f"Unknown column in USING: {identifier.name}")
+            sources.append(join.this)
+
+def _is_read(statement: exp.Expression) -> bool:
+    """A query with no data-modifying parts anywhere, including CTEs"""
+    return isinstance(statement, exp.Query) and not any(
+        statement.find_all(exp.Insert, exp.Update, exp.Delete, exp.Merge)
+    )
+
+@lru_cache(maxsize=SQL_PARSE_CACHE_SIZE)
+def is_read_statement(sql: str) -> bool:
+    """
+    Parse a statement and report whether it only reads data.
+    Anything that does not parse as a single query counts as a write.
+    Results are cached by SQL text.
+
+    Args:
+        sql: The SQL statement to classify
+    """
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read="postgres") if statement is not None]
+    except SqlglotError:
+        return False
+    return len(statements) == 1 and _is_read(statements[0])
+
+@lru_cache(maxsize=SQL_PARSE_CACHE_SIZE)
+def validate_sql(sql: str) -> SQLValidationResult:
+    """
+    Parse a single PostgreSQL statement, check it against the known schema
+    and return its canonical form. Results are cached by SQL text.
+
+    Args:
+        sql: The SQL statement to validate
+    """
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read="postgres") if statement is not None]
+        if len(statements) != 1:
+            raise ValueError(f"Expected exactly one SQL statement, found {len(statements)}")
+
+        statement = statements[0]
+        if isinstance(statement, exp.Command):
+            raise ValueError(f"Unsupported statement: {statement.sql(dialect='postgres')[:60]}")
+
+        tables = _check_references(statement, known_schema())
+        return SQLValidationResult(
+            valid=True,
+            sql=sql,
+            canonical=statement.sql(dialect="postgres") + ";",
+            kind=statement.key.upper(),
+            read_only=_is_read(statement),
+            tables=tables,
+        )
+
+    except (SqlglotError, ValueError) as e:
+        message = str(e).splitlines()[0] if str(e) else type(e).__name__
+        logger.info(f"SQL failed validation: {message}")
+        return SQLValidationResult(valid=False, sql=sql, error=message)
@@ -1,15 +1,42 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import os
+import asyncio
 import subprocess
 import json
-from typing import Dict, Any, List
+import time
+import urllib.parse
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from mcp_system.mcp_client import mcp_client
+from mcp_system.serialization import ROW_SHAPES, rows_response, dumps
+from database.routing import current_client
+from monitoring.metrics import (span, start_request_spans, end_request_spans, server_timing_header,
+                                render_metrics, REQUEST_SECONDS, REQUESTS_TOTAL)
+from monitoring.slow_queries import slow_query_log
+from monitoring.profiler import SamplingProfiler
+from mcp_system.export import EXPORT_MEDIA_TYPES, EXPORT_FILE_EXTENSIONS, resolve_export_format, export_query
+from inventory.stock_index import stock_index, StockListener
+from inventory.movements import PartitionMaintainer
 
 load_dotenv()
 
+# Add a Server-Timing breakdown to every response, not only to requests that ask for it
+REQUEST_TIMING_HEADER = os.getenv('REQUEST_TIMING_HEADER', 'false').strip('"\'').lower() == 'true'
+# Allow ?profile=1 / X-Profile: 1 to return a sampled profile instead of the response
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').strip('"\'').lower() == 'true'
+# When set, admin endpoints require a matching X-Admin-Token header
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '').strip('"\'')
+# Keep an in-memory stock index, fed by LISTEN/NOTIFY, for low-stock queries and alerts
+STOCK_INDEX_ENABLED = os.getenv('STOCK_INDEX_ENABLED', 'true').strip('"\'').lower() == 'true'
+# Maintain partitions of the stock movement ledger (database/stock_movements.sql)
+STOCK_LEDGER_ENABLED = os.getenv('STOCK_LEDGER_ENABLED', 'true').strip('"\'').lower() == 'true'
+# Seconds between keep-alive comments on the alert stream
+ALERT_KEEPALIVE_SECONDS = float(os.getenv('ALERT_KEEPALIVE_SECONDS', '15'))
+
 app = FastAPI(title="Smart-IMS API")
 
 # Add CORS middleware for frontend
@@ -21,6 +48,110 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def identify_client(request: Request, call_next):
+    """
+    Tag the request with a client id (X-Client-ID header, else the peer address)
+    so reads right after a write from the same client go to the primary.
+    """
+    client_id = request.headers.get("X-Client-ID") or (request.client.host if request.client else None)
+    token = current_client.set(client_id)
+    try:
+        return await call_next(request)
+    finally:
+        current_client.reset(token)
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """
+    Record request metrics and collect per-stage spans. Clients that send
+    X-Request-Timing: 1 get the breakdown back in a Server-Timing header.
+    """
+    spans, token = start_request_spans()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        REQUEST_SECONDS.labels(request.method, path).observe(elapsed)
+        REQUESTS_TOTAL.labels(request.method, path, str(status)).inc()
+        end_request_spans(token)
+    
+    if REQUEST_TIMING_HEADER or request.headers.get("X-Request-Timing") in ("1", "true"):
+        response.headers["Server-Timing"] = server_timing_header(spans, elapsed)
+    
+    return response
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Opt-in sampling profiler. When profiling is enabled and the request has
+    ?profile=1 or X-Profile: 1, the handler runs as usual but the response
+    body is replaced by its stacks in collapsed (flamegraph) format.
+    """
+    wants_profile = request.query_params.get("profile") in ("1", "true") \
+        or request.headers.get("X-Profile") in ("1", "true")
+    if not (PROFILING_ENABLED and wants_profile):
+        return await call_next(request)
+    
+    profiler = SamplingProfiler().start()
+    try:
+        response = await call_next(request)
+        # Drain the body so streamed work is part of the profile
+        async for _ in response.body_iterator:
+            pass
+    finally:
+        profiler.stop()
+    
+    return PlainTextResponse(profiler.collapsed(), headers={
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Profiled-Status": str(response.status_code),
+    })
+
+stock_listener: Optional[StockListener] = None
+partition_maintainer: Optional[PartitionMaintainer] = None
+
+@app.on_event("startup")
+def start_stock_index():
+    """
+    Load the stock index and follow inventory changes in the background.
+    Until the first load finishes, tools fall back to querying the database.
+    """
+    global stock_listener
+    if not STOCK_INDEX_ENABLED:
+        return
+    # Import here to avoid circular imports
+    from mcp_system.mcp_server import db_router
+    # NOTIFY is not delivered on replicas, so listen on the primary
+    stock_listener = StockListener(stock_index, db_router.connect_primary)
+    stock_listener.start()
+
+@app.on_event("startup")
+def start_partition_maintenance():
+    """Keep monthly stock movement partitions created ahead of time"""
+    global partition_maintainer
+    if not STOCK_LEDGER_ENABLED:
+        return
+    from mcp_system.mcp_server import db_router
+    partition_maintainer = PartitionMaintainer(db_router.connect_primary)
+    partition_maintainer.start()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    if stock_listener:
+        stock_listener.stop()
+    if partition_maintainer:
+        partition_maintainer.stop()
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check the admin token when one is configured"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
 # Request models
 class QueryRequest(BaseModel):
     question: str
@@ -33,6 +164,46 @@ class InventoryRequest(BaseModel):
     warehouse_id: int
     quantity: int
 
+def validate_shape(shape: str):
+    """Reject unknown result payload shapes"""
+    if shape not in ROW_SHAPES:
+        raise HTTPException(status_code=400, detail=f"Unknown shape '{shape}', expected one of {', '.join(ROW_SHAPES)}")
+
+def validate_export_format(export_format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """Resolve the export format from the query parameter or Accept header"""
+    try:
+        return resolve_export_format(export_format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def export_response(sql: str, export_format: str, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """
+    Stream query results as CSV, Arrow IPC or Parquet.
+    The first batch is fetched up front so SQL errors still return a 400.
+    """
+    try:
+        chunks = await run_in_threadpool(export_query, sql, export_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"smart_ims_export.{EXPORT_FILE_EXTENSIONS[export_format]}"
+    response_headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    response_headers.update(headers or {})
+    
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[export_format], headers=response_headers)
+
+async def fetch_rows(sql: str):
+    """
+    Run SQL through MCP and return (columns, rows) as tuples.
+    Database errors come back as a single error row, like execute_sql_query.
+    """
+    result = await mcp_client.call_tool("fetch_sql_rows", {"sql": sql})
+    
+    if not result.get("success"):
+        return ["error", "status"], [(result.get("error"), "error")]
+    
+    return result["result"]["columns"], result["result"]["rows"]
+
 @app.get("/")
 def read_root():
     return {"message": "Smart-IMS API is running"}
@@ -41,11 +212,29 @@ def read_root():
 def health_check():
     return {"status": "healthy", "service": "Smart-IMS API"}
 
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics: request and per-stage latency histograms, tool calls,
+    rows per query, LLM tokens/sec, cache hits and open connections
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 @app.post("/api/query")
-async def natural_language_query(request: QueryRequest):
+async def natural_language_query(request: QueryRequest, shape: str = Query("rows"),
+                                 format: Optional[str] = Query(None), accept: Optional[str] = Header(None)):
     """
     Process a natural language query about inventory using Ollama + MCP
+    
+    The shape query parameter selects "rows" (list of objects) or
+    "columnar" (column names once, one array of values per column).
+    The format query parameter (or Accept header) selects a streamed
+    csv, arrow or parquet export instead of JSON.
     """
+    validate_shape(shape)
+    export_format = validate_export_format(format, accept)
+    
     try:
         # Step 1: Convert natural language to SQL using Ollama (via MCP)
         sql_result = await mcp_client.call_tool("text_to_sql", {"text": request.question})
@@ -57,56 +246,69 @@ async def natural_language_query(request: QueryRequest):
         
         # Step 2: Execute the generated SQL
         if generated_sql and not generated_sql.startswith("--"):
-            execution_result = await mcp_client.call_tool("execute_sql_query", {"sql": generated_sql})
-            
-            if not execution_result.get("success"):
-                raise HTTPException(status_code=500, detail=f"Failed to execute SQL: {execution_result.get('error')}")
+            if export_format:
+                headers = {"X-Generated-SQL": urllib.parse.quote(generated_sql)}
+                return await export_response(generated_sql, export_format, headers)
             
-            results = execution_result["result"]
+            columns, rows = await fetch_rows(generated_sql)
         else:
-            results = [{"message": "Could not generate executable SQL", "generated_sql": generated_sql}]
+            columns = ["message", "generated_sql"]
+            rows = [("Could not generate executable SQL", generated_sql)]
         
         response = {
             "question": request.question,
             "sql_generated": generated_sql,
-            "results": results,
+            "results": None,
             "status": "success"
         }
         
-        return response
+        with span("serialize"):
+            return rows_response(response, columns, rows, shape)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/sql")
-async def execute_sql(request: SQLRequest):
+async def execute_sql(request: SQLRequest, shape: str = Query("rows"),
+                      format: Optional[str] = Query(None), accept: Optional[str] = Header(None)):
     """
     Execute a raw SQL query (for testing/admin use)
+    
+    The shape query parameter selects "rows" (list of objects) or
+    "columnar" (column names once, one array of values per column).
+    The format query parameter (or Accept header) selects a streamed
+    csv, arrow or parquet export instead of JSON.
     """
+    validate_shape(shape)
+    export_format = validate_export_format(format, accept)
+    
+    if export_format:
+        return await export_response(request.sql, export_format)
+    
     try:
-        result = await mcp_client.call_tool("execute_sql_query", {"sql": request.sql})
-        
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail=result.get('error'))
+        columns, rows = await fetch_rows(request.sql)
         
         response = {
             "sql": request.sql,
-            "results": result["result"],
+            "results": None,
             "status": "success"
         }
         
-        return response
+        with span("serialize"):
+            return rows_response(response, columns, rows, shape)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/inventory/low-stock")
-async def get_low_stock():
+async def get_low_stock(warehouse_id: Optional[int] = Query(None)):
     """
     Get products with low stock levels
     """
     try:
-        result = await mcp_client.call_tool("get_low_stock_items", {})
+        result = await mcp_client.call_tool("get_low_stock_items", {"warehouse_id": warehouse_id})
         
         if not result.get("success"):
             raise HTTPException(status_code=500, detail=result.get('error'))
@@ -119,6 +321,136 @@ async def get_low_stock():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/inventory/warehouses/{warehouse_id}/stock")
+async def get_warehouse_stock(warehouse_id: int):
+    """
+    Get current stock of every product at one warehouse
+    """
+    try:
+        result = await mcp_client.call_tool("get_warehouse_stock", {"warehouse_id": warehouse_id})
+        
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get('error'))
+        
+        return {
+            "warehouse_id": warehouse_id,
+            "stock": result["result"],
+            "status": "success"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/inventory/alerts/stream")
+async def stream_stock_alerts(request: Request, warehouse_id: Optional[int] = Query(None)):
+    """
+    Server-Sent Events stream of reorder alerts: a low_stock event when an
+    item drops to its reorder level, restocked when it climbs back above it
+    """
+    if not STOCK_INDEX_ENABLED:
+        raise HTTPException(status_code=503, detail="Stock index is disabled")
+    
+    queue = stock_index.events.subscribe()
+    
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), ALERT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if warehouse_id is not None and event["warehouse_id"] != warehouse_id:
+                    continue
+                yield b"event: " + event["event"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+        finally:
+            stock_index.events.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/inventory/products/{product_id}/trend")
+async def get_stock_trend(product_id: int, warehouse_id: Optional[int] = Query(None),
+                          days: int = Query(30, ge=1, le=3650), granularity: str = Query("day")):
+    """
+    Get units in and out of a product per hour or day, from the movement rollups
+    """
+    try:
+        result = await mcp_client.call_tool("get_stock_trend", {
+            "product_id": product_id,
+            "warehouse_id": warehouse_id,
+            "days": days,
+            "granularity": granularity
+        })
+        
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get('error'))
+        if result["result"] and result["result"][0].get("status") == "error":
+            raise HTTPException(status_code=400, detail=result["result"][0]["error"])
+        
+        return {
+            "product_id": product_id,
+            "granularity": granularity,
+            "trend": result["result"],
+            "status": "success"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/inventory/velocity")
+async def get_stock_velocity(warehouse_id: Optional[int] = Query(None), days: int = Query(30, ge=1, le=3650),
+                             limit: int = Query(20, ge=1, le=1000)):
+    """
+    Get the fastest-moving products with average daily outbound and days of cover
+    """
+    try:
+        result = await mcp_client.call_tool("get_stock_velocity", {
+            "warehouse_id": warehouse_id,
+            "days": days,
+            "limit": limit
+        })
+        
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get('error'))
+        
+        return {
+            "days": days,
+            "velocity": result["result"],
+            "status": "success"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/inventory/reorder-plan")
+async def get_reorder_plan(warehouse_id: Optional[int] = Query(None), limit: int = Query(100, ge=1, le=100000)):
+    """
+    Get suggested purchase orders (quantity, supplier, cost) for every
+    product/warehouse pair that needs restocking, most urgent first
+    """
+    try:
+        result = await mcp_client.call_tool("get_reorder_recommendations", {
+            "warehouse_id": warehouse_id,
+            "limit": limit
+        })
+        
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get('error'))
+        if result["result"].get("status") == "error":
+            raise HTTPException(status_code=500, detail=result["result"]["error"])
+        
+        with span("serialize"):
+            return Response(content=dumps({**result["result"], "status": "success"}),
+                            media_type="application/json")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/inventory/summary")
 async def get_inventory_summary():
     """
@@ -181,6 +513,25 @@ async def get_database_schema():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/admin/slow-queries", dependencies=[Depends(require_admin)])
+def get_slow_queries(limit: Optional[int] = Query(None, ge=1)):
+    """
+    Recent slow statements, newest first, with EXPLAIN ANALYZE plans for
+    reads over the explain threshold
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "explain_threshold_ms": slow_query_log.explain_ms,
+        "queries": slow_query_log.recent(limit),
+        "status": "success"
+    }
+
+@app.delete("/api/admin/slow-queries", dependencies=[Depends(require_admin)])
+def clear_slow_queries():
+    """Empty the slow query log"""
+    slow_query_log.clear()
+    return {"status": "success"}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
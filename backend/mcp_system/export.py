@@ -0,0 +1,328 @@
+import contextvars
+import io
+import json
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+import psycopg2
+
+from mcp_system.mcp_server import get_db_connection
+from monitoring.metrics import span
+from mcp_system.guardrails import GuardrailError, SQL_EXPORT_TIMEOUT_MS, guard_statement, strip_statement
+
+# Export formats and the media types they are served with
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Accept header values that select an export format
+ACCEPT_FORMATS = {
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+EXPORT_FILE_EXTENSIONS = {"csv": "csv", "arrow": "arrows", "parquet": "parquet"}
+
+# Rows fetched per server-side cursor round trip / per Arrow record batch
+BATCH_SIZE = 10000
+
+# Chunks buffered between the COPY thread and the response
+COPY_QUEUE_SIZE = 16
+
+_DONE = object()
+
+# PostgreSQL type OIDs with a fixed Arrow type; anything not listed is exported as text
+PG_ARROW_TYPES = {
+    16: lambda pa: pa.bool_(),                        # bool
+    20: lambda pa: pa.int64(),                        # int8
+    21: lambda pa: pa.int16(),                        # int2
+    23: lambda pa: pa.int32(),                        # int4
+    26: lambda pa: pa.int64(),                        # oid
+    700: lambda pa: pa.float32(),                     # float4
+    701: lambda pa: pa.float64(),                     # float8
+    19: lambda pa: pa.string(),                       # name
+    25: lambda pa: pa.string(),                       # text
+    1042: lambda pa: pa.string(),                     # bpchar
+    1043: lambda pa: pa.string(),                     # varchar
+    1082: lambda pa: pa.date32(),                     # date
+    1083: lambda pa: pa.time64("us"),                 # time
+    1114: lambda pa: pa.timestamp("us"),              # timestamp
+    1184: lambda pa: pa.timestamp("us", tz="UTC"),    # timestamptz
+    1186: lambda pa: pa.duration("us"),               # interval
+}
+PG_NUMERIC = 1700
+PG_BYTEA = 17
+PG_JSON_TYPES = {114, 3802}
+
+def resolve_export_format(export_format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """
+    Pick the export format from the format query parameter or the Accept header.
+    Returns None for a regular JSON response.
+
+    Args:
+        export_format: Value of the format query parameter, takes precedence
+        accept: Value of the Accept header
+    """
+    if export_format:
+        export_format = export_format.lower()
+        if export_format == "json":
+            return None
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unknown format '{export_format}', expected json or one of {', '.join(EXPORT_MEDIA_TYPES)}")
+        return export_format
+
+    if accept:
+        for media_type in accept.split(","):
+            media_type = media_type.split(";")[0].strip().lower()
+            if media_type in ACCEPT_FORMATS:
+                return ACCEPT_FORMATS[media_type]
+
+    return None
+
+class _QueueWriter:
+    """File-like sink for copy_expert that hands chunks to a bounded queue"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def write(self, data):
+        # Block while the consumer is behind, so memory stays bounded
+        while True:
+            if self.cancelled.is_set():
+                raise IOError("Export cancelled by client")
+            try:
+                self.chunks.put(data, timeout=0.5)
+                return len(data)
+            except queue.Full:
+                continue
+
+def _prime(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Pull the first chunk eagerly so SQL errors are raised before the
+    response starts, then return an iterator over the full stream.
+    """
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return iter(())
+
+    def stream():
+        yield first
+        yield from chunks
+
+    return stream()
+
+def stream_csv(sql: str) -> Iterator[bytes]:
+    """
+    Stream a SELECT as CSV using COPY ... TO STDOUT.
+    The COPY runs in a worker thread and feeds a bounded queue.
+    Exports skip the row cap but keep the cost limit. The COPY is a single
+    statement that runs as long as the client takes to download, so it is
+    bounded by SQL_EXPORT_TIMEOUT_MS instead of the statement timeout.
+
+    Args:
+        sql: The SELECT statement to export
+    """
+    chunks = queue.Queue(maxsize=COPY_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def run_copy():
+        conn = None
+        try:
+            conn = get_db_connection(read_only=True)
+            guarded_sql = guard_statement(conn, sql, cap_rows=False, timeout_ms=SQL_EXPORT_TIMEOUT_MS, read_only=True)
+            copy_sql = f"COPY ({strip_statement(guarded_sql)}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+            cursor = conn.cursor()
+            cursor.copy_expert(copy_sql, _QueueWriter(chunks, cancelled), size=64 * 1024)
+            chunks.put(_DONE)
+        except Exception as e:
+            if not cancelled.is_set():
+                chunks.put(e)
+        finally:
+            if conn:
+                conn.close()
+
+    def generate():
+        # Carry the request context into the worker so replica routing sees the client
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(run_copy,), daemon=True)
+        worker.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _DONE:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        finally:
+            cancelled.set()
+
+    return _prime(generate())
+
+def _fetch_batches(sql: str) -> Iterator[tuple]:
+    """
+    Yield (cursor description, row batch) from a server-side cursor so only
+    BATCH_SIZE rows are held in memory at once. An empty result still
+    yields one empty batch so the columns are known.
+    """
+    conn = get_db_connection(read_only=True)
+    try:
+        sql = guard_statement(conn, sql, cap_rows=False, read_only=True)
+        cursor = conn.cursor(name="smart_ims_export")
+        cursor.itersize = BATCH_SIZE
+        cursor.execute(strip_statement(sql))
+
+        rows = cursor.fetchmany(BATCH_SIZE)
+        description = cursor.description
+        yield description, rows
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            yield description, rows
+    finally:
+        conn.close()
+
+def _arrow_column(column) -> tuple:
+    """
+    Arrow type for a result column, from its PostgreSQL type OID, plus a
+    converter applied to each non-NULL value (None when values map as-is).
+    Types are fixed up front so later batches can't disagree with the first.
+    """
+    import pyarrow as pa
+
+    type_code = column.type_code
+    if type_code in PG_ARROW_TYPES:
+        return PG_ARROW_TYPES[type_code](pa), None
+    if type_code == PG_NUMERIC:
+        if column.precision and column.precision <= 38 and column.scale is not None:
+            return pa.decimal128(column.precision, column.scale), None
+        # Unconstrained NUMERIC (SUM, AVG, ...) has no fixed scale
+        return pa.float64(), float
+    if type_code in PG_JSON_TYPES:
+        return pa.string(), json.dumps
+    if type_code == PG_BYTEA:
+        return pa.binary(), bytes
+    return pa.string(), str
+
+def _record_batches(sql: str):
+    """Yield pyarrow RecordBatches for a SELECT, one per fetched batch"""
+    # Import here so the API does not pay for pyarrow unless exporting
+    import pyarrow as pa
+
+    schema = None
+    converters = None
+    for description, rows in _fetch_batches(sql):
+        if schema is None:
+            columns = [_arrow_column(column) for column in description]
+            schema = pa.schema([pa.field(column.name, arrow_type)
+                                for column, (arrow_type, _) in zip(description, columns)])
+            converters = [converter for _, converter in columns]
+
+        values = list(zip(*rows)) or [[] for _ in schema]
+        arrays = []
+        for column_values, field, converter in zip(values, schema, converters):
+            if converter:
+                column_values = [None if value is None else converter(value) for value in column_values]
+            arrays.append(pa.array(column_values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only sink that collects writer output until drained.
+    Keeps a running position because the Parquet footer records offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_arrow(sql: str) -> Iterator[bytes]:
+    """
+    Stream a SELECT in the Arrow IPC streaming format, one record batch at a time.
+
+    Args:
+        sql: The SELECT statement to export
+    """
+    import pyarrow as pa
+
+    def generate():
+        sink = _ChunkSink()
+        writer = None
+        for batch in _record_batches(sql):
+            if writer is None:
+                writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    return _prime(generate())
+
+def stream_parquet(sql: str) -> Iterator[bytes]:
+    """
+    Stream a SELECT as a Parquet file, one row group per fetched batch.
+
+    Args:
+        sql: The SELECT statement to export
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def generate():
+        sink = _ChunkSink()
+        writer = None
+        for batch in _record_batches(sql):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema, compression="zstd")
+            writer.write_table(pa.Table.from_batches([batch]))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    return _prime(generate())
+
+EXPORTERS = {
+    "csv": stream_csv,
+    "arrow": stream_arrow,
+    "parquet": stream_parquet,
+}
+
+def export_query(sql: str, export_format: str) -> Iterator[bytes]:
+    """
+    Start streaming a SELECT in the given export format.
+    Errors from the first batch are raised immediately.
+
+    Args:
+        sql: The SELECT statement to export
+        export_format: One of EXPORT_MEDIA_TYPES
+    """
+    try:
+        with span(f"export.{export_format}.first_batch"):
+            return EXPORTERS[export_format](sql)
+    except (psycopg2.Error, GuardrailError) as e:
+        raise ValueError(str(e).strip()) from e
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from llm.sql_validator import is_read_statement
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Guardrail configuration
+SQL_MAX_COST = float(os.getenv('SQL_MAX_COST', '1000000'))
+SQL_MAX_ROWS = int(os.getenv('SQL_MAX_ROWS', '100000'))
+SQL_STATEMENT_TIMEOUT_MS = int(os.getenv('SQL_STATEMENT_TIMEOUT_MS', '30000'))
+# CSV exports run as one COPY paced by the client's download, so they get their own timeout; 0 disables it
+SQL_EXPORT_TIMEOUT_MS = int(os.getenv('SQL_EXPORT_TIMEOUT_MS', '3600000'))
+# "limit" rewrites oversized SELECTs with a LIMIT, "reject" refuses them
+SQL_ROW_CAP_ACTION = os.getenv('SQL_ROW_CAP_ACTION', 'limit').strip('"\'').lower()
+
+EXPLAINABLE_KINDS = {"SELECT", "WITH", "VALUES", "TABLE", "INSERT", "UPDATE", "DELETE", "MERGE"}
+
+# Quoted strings, quoted identifiers, dollar-quoted bodies and comments
+_MASK_PATTERN = re.compile(
+    r"'(?:[^']|'')*'"
+    r'|"(?:[^"]|"")*"'
+    r"|\$(\w*)\$.*?\$\1\$"
+    r"|--[^\n]*"
+    r"|/\*.*?\*/",
+    re.DOTALL,
+)
+
+class GuardrailError(Exception):
+    """Raised when a statement is refused before execution"""
+
+def _mask(sql: str) -> str:
+    """Blank out literals and comments so keywords and semicolons can be scanned safely"""
+    return _MASK_PATTERN.sub(" ", sql)
+
+def strip_statement(sql: str) -> str:
+    """Trim whitespace and the trailing semicolon"""
+    return sql.strip().rstrip(";").strip()
+
+def statement_kind(sql: str) -> str:
+    """
+    Return the leading keyword of a statement (SELECT, INSERT, ...).
+
+    Args:
+        sql: The SQL statement
+    """
+    masked = _mask(sql).lstrip(" \n\t(")
+    match = re.match(r"[A-Za-z]+", masked)
+    return match.group(0).upper() if match else ""
+
+def check_single_statement(sql: str):
+    """Refuse input that packs several statements together"""
+    if ";" in _mask(strip_statement(sql)):
+        raise GuardrailError("Only a single SQL statement can be executed per request")
+
+def estimate(cursor, sql: str, params: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+    """
+    Run EXPLAIN and return the planner's estimated total cost and rows.
+
+    Args:
+        cursor: An open cursor on the connection that will run the statement
+        sql: The SQL statement
+        params: Query parameters, if any
+    """
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {strip_statement(sql)}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    top = plan[0]["Plan"]
+    return {"cost": top.get("Total Cost", 0.0), "rows": top.get("Plan Rows", 0)}
+
+def apply_session_limits(conn, sql: Optional[str] = None, timeout_ms: Optional[int] = None,
+                         read_only: Optional[bool] = None):
+    """
+    Put the connection in a read-only transaction for reads and set a
+    statement_timeout for the current transaction.
+
+    Args:
+        conn: A fresh psycopg2 connection
+        sql: The statement that is about to run; only needed when read_only is omitted
+        timeout_ms: Override for SQL_STATEMENT_TIMEOUT_MS; 0 disables the timeout
+        read_only: Whether the statement only reads data; parsed from the SQL if omitted
+    """
+    if read_only is None:
+        read_only = is_read_statement(sql)
+    conn.set_session(readonly=read_only)
+    cursor = conn.cursor()
+    cursor.execute("SET LOCAL statement_timeout = %s",
+                   (SQL_STATEMENT_TIMEOUT_MS if timeout_ms is None else timeout_ms,))
+    cursor.close()
+
+def guard_statement(conn, sql: str, cap_rows: bool = True, timeout_ms: Optional[int] = None,
+                    params: Optional[Sequence[Any]] = None, read_only: Optional[bool] = None) -> str:
+    """
+    Pre-execution stage: apply session limits, estimate the statement with
+    EXPLAIN and reject or rewrite it when it exceeds the configured thresholds.
+    Returns the SQL that should actually be executed.
+
+    Args:
+        conn: A fresh psycopg2 connection
+        sql: The SQL statement
+        cap_rows: Whether oversized SELECTs may be rewritten with a LIMIT
+        timeout_ms: Override for SQL_STATEMENT_TIMEOUT_MS; 0 disables the timeout
+        params: Query parameters, if any
+        read_only: Whether the statement only reads data; parsed from the SQL if omitted
+    """
+    check_single_statement(sql)
+    if read_only is None:
+        read_only = is_read_statement(sql)
+    apply_session_limits(conn, timeout_ms=timeout_ms, read_only=read_only)
+
+    kind = statement_kind(sql)
+    if kind not in EXPLAINABLE_KINDS:
+        return sql
+
+    cursor = conn.cursor()
+    try:
+        plan = estimate(cursor, sql, params)
+    finally:
+        cursor.close()
+
+    if plan["cost"] > SQL_MAX_COST:
+        raise GuardrailError(
+            f"Statement rejected: estimated cost {plan['cost']:.0f} exceeds limit {SQL_MAX_COST:.0f} "
+            f"(estimated rows: {plan['rows']})"
+        )
+
+    if cap_rows and read_only and plan["rows"] > SQL_MAX_ROWS:
+        if SQL_ROW_CAP_ACTION == "reject":
+            raise GuardrailError(
+                f"Statement rejected: estimated {plan['rows']} rows exceeds limit {SQL_MAX_ROWS}"
+            )
+        logger.warning(f"Capping statement at {SQL_MAX_ROWS} rows (estimated {plan['rows']})")
+        return f"SELECT * FROM ({strip_statement(sql)}) AS capped LIMIT {SQL_MAX_ROWS}"
+
+    return sql
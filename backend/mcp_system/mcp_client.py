@@ -5,6 +5,7 @@ import os
 from typing import Dict, List, Any, Optional
 import logging
 from llm.ollama_client import ollama_client
+from monitoring.metrics import span, TOOL_CALLS_TOTAL
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +70,9 @@ class MCPClient:
             
             # For now, we'll simulate the MCP call
             # In a real implementation, this would use the MCP protocol
-            result = await self._simulate_tool_call(tool_name, arguments)
+            with span(f"mcp.{tool_name}"):
+                result = await self._simulate_tool_call(tool_name, arguments)
+            TOOL_CALLS_TOTAL.labels(tool_name, "success").inc()
             
             return {
                 "success": True,
@@ -78,6 +81,7 @@ class MCPClient:
             
         except Exception as e:
             logger.error(f"Error calling tool {tool_name}: {e}")
+            TOOL_CALLS_TOTAL.labels(tool_name, "error").inc()
             return {
                 "success": False,
                 "error": str(e)
@@ -92,10 +96,19 @@ class MCPClient:
             from mcp_system.mcp_server import execute_sql_query
             return execute_sql_query(arguments.get("sql", ""))
         
+        elif tool_name == "fetch_sql_rows":
+            from mcp_system.mcp_server import fetch_sql_rows
+            columns, rows = fetch_sql_rows(arguments.get("sql", ""))
+            return {"columns": columns, "rows": rows}
+        
         elif tool_name == "get_low_stock_items":
             from mcp_system.mcp_server import get_low_stock_items
             return get_low_stock_items(arguments.get("warehouse_id"))
         
+        elif tool_name == "get_warehouse_stock":
+            from mcp_system.mcp_server import get_warehouse_stock
+            return get_warehouse_stock(arguments.get("warehouse_id"))
+        
         elif tool_name == "add_inventory":
             from mcp_system.mcp_server import add_inventory
             return add_inventory(
@@ -104,6 +117,30 @@ class MCPClient:
                 arguments.get("quantity")
             )
         
+        elif tool_name == "get_stock_trend":
+            from mcp_system.mcp_server import get_stock_trend
+            return get_stock_trend(
+                arguments.get("product_id"),
+                arguments.get("warehouse_id"),
+                arguments.get("days", 30),
+                arguments.get("granularity", "day")
+            )
+        
+        elif tool_name == "get_stock_velocity":
+            from mcp_system.mcp_server import get_stock_velocity
+            return get_stock_velocity(
+                arguments.get("warehouse_id"),
+                arguments.get("days", 30),
+                arguments.get("limit", 20)
+            )
+        
+        elif tool_name == "get_reorder_recommendations":
+            from mcp_system.mcp_server import get_reorder_recommendations
+            return get_reorder_recommendations(
+                arguments.get("warehouse_id"),
+                arguments.get("limit", 100)
+            )
+        
         elif tool_name == "get_inventory_summary":
             from mcp_system.mcp_server import get_inventory_summary
             return get_inventory_summary()
@@ -1,13 +1,18 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
 from mcp.server.fastmcp import FastMCP
 from mcp.server.models import InitializationOptions
-import psycopg2
-import psycopg2.extras
 from dotenv import load_dotenv
 import os
+import time
 import urllib.parse
+from mcp_system.guardrails import guard_statement, apply_session_limits
+from database.routing import ReplicaRouter
+from llm.sql_validator import is_read_statement
+from monitoring.metrics import span, QUERY_ROWS
+from monitoring.slow_queries import slow_query_log
+from inventory.stock_index import stock_index
 
 # Load environment variables
 load_dotenv()
@@ -19,18 +24,92 @@ DB_NAME = os.getenv('DB_NAME', '').strip('"\'')
 DB_USER = os.getenv('DB_USER', '').strip('"\'')
 DB_PASSWORD = urllib.parse.quote(os.getenv('DB_PASSWORD', '').strip('"\''))
 
+# Read replica configuration (comma-separated libpq DSNs or URIs)
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_DSNS', '').strip('"\'').split(',') if dsn.strip()]
+DB_REPLICA_BALANCING = os.getenv('DB_REPLICA_BALANCING', 'round_robin').strip('"\'')
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '10'))
+
+# Stock movement rollup table per trend granularity
+MOVEMENT_ROLLUPS = {"hour": "stock_movements_hourly", "day": "stock_movements_daily"}
+
 # Create the MCP server instance
 mcp = FastMCP("Smart-IMS Database Server")
 
-def get_db_connection():
-    """Create a database connection"""
-    return psycopg2.connect(
+# Routes reads to replicas and writes to the primary
+db_router = ReplicaRouter(
+    primary=dict(
         host=DB_HOST,
         port=DB_PORT,
         database=DB_NAME,
         user=DB_USER,
         password=urllib.parse.unquote(DB_PASSWORD)
-    )
+    ),
+    replica_dsns=DB_REPLICA_DSNS,
+    balancing=DB_REPLICA_BALANCING,
+    max_lag_seconds=DB_REPLICA_MAX_LAG_SECONDS,
+    lag_check_interval=DB_REPLICA_LAG_CHECK_INTERVAL,
+    read_your_writes_seconds=DB_READ_YOUR_WRITES_SECONDS
+)
+
+def get_db_connection(read_only: bool = False):
+    """
+    Create a database connection.
+    Read-only work may be served by a replica; everything else uses the primary.
+    """
+    return db_router.connect(read_only)
+
+def fetch_sql_rows(sql: str, read_only: Optional[bool] = None,
+                   params: Optional[Tuple[Any, ...]] = None) -> Tuple[List[str], List[tuple]]:
+    """
+    Execute a SQL query and return the column names plus the raw row tuples.
+    Skips per-row dict construction so callers can serialize rows directly.
+    The statement passes the guardrails first (cost/row limits, timeout,
+    read-only transaction for reads). Raises on database or guardrail errors.
+    
+    Args:
+        sql: The SQL query to execute
+        read_only: Whether the statement only reads data; parsed from the SQL if omitted
+        params: Query parameters for %s placeholders, if any
+    """
+    if read_only is None:
+        read_only = is_read_statement(sql)
+    
+    conn = None
+    try:
+        with span("db.connect"):
+            conn = get_db_connection(read_only)
+        with span("db.guardrails"):
+            sql = guard_statement(conn, sql, params=params, read_only=read_only)
+        cursor = conn.cursor()
+        start = time.perf_counter()
+        with span("db.execute"):
+            cursor.execute(sql, params)
+        
+        # Handle SELECT queries (and writes with RETURNING)
+        columns, rows = None, None
+        if cursor.description:
+            columns = [column.name for column in cursor.description]
+            with span("db.fetch"):
+                rows = cursor.fetchall()
+            QUERY_ROWS.observe(len(rows))
+        
+        # Handle INSERT/UPDATE/DELETE queries
+        if not read_only:
+            with span("db.commit"):
+                conn.commit()
+            db_router.record_write()
+        
+        row_count = len(rows) if rows is not None else cursor.rowcount
+        slow_query_log.record(sql, params, (time.perf_counter() - start) * 1000, row_count, read_only)
+        
+        if columns is not None:
+            return columns, rows
+        return ["affected_rows", "status"], [(cursor.rowcount, "success")]
+    finally:
+        if conn:
+            conn.close()
 
 @mcp.tool()
 def execute_sql_query(sql: str) -> List[Dict[str, Any]]:
@@ -41,25 +120,25 @@ def execute_sql_query(sql: str) -> List[Dict[str, Any]]:
     Args:
         sql: The SQL query to execute
     """
+    return run_sql_query(sql)
+
+def run_sql_query(sql: str, read_only: Optional[bool] = None,
+                  params: Optional[Tuple[Any, ...]] = None) -> List[Dict[str, Any]]:
+    """
+    Shared body of execute_sql_query for the built-in tools, which already
+    know whether they read or write.
+    
+    Args:
+        sql: The SQL query to execute
+        read_only: Whether the statement only reads data; parsed from the SQL if omitted
+        params: Query parameters for %s placeholders, if any
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(sql)
-        
-        # Handle SELECT queries
-        if cursor.description:
-            results = cursor.fetchall()
-            return [dict(row) for row in results]
-        else:
-            # Handle INSERT/UPDATE/DELETE queries
-            conn.commit()
-            return [{"affected_rows": cursor.rowcount, "status": "success"}]
+        columns, rows = fetch_sql_rows(sql, read_only, params)
+        return [dict(zip(columns, row)) for row in rows]
             
     except Exception as e:
         return [{"error": str(e), "status": "error"}]
-    finally:
-        if conn:
-            conn.close()
 
 @mcp.tool()
 def get_database_schema() -> Dict[str, Any]:
@@ -98,13 +177,59 @@ def get_database_schema() -> Dict[str, Any]:
             "suppliers": {
                 "columns": ["id (INTEGER, PRIMARY KEY)", "name (VARCHAR)", "contact (VARCHAR)"],
                 "description": "Supplier information"
+            },
+            "supplier_products": {
+                "columns": [
+                    "supplier_id (INTEGER, FOREIGN KEY to suppliers.id)",
+                    "product_id (INTEGER, FOREIGN KEY to products.id)",
+                    "unit_cost (FLOAT)",
+                    "lead_time_days (INTEGER)",
+                    "min_order_qty (INTEGER)",
+                    "pack_size (INTEGER)"
+                ],
+                "description": "Which suppliers sell each product, at what cost and lead time"
+            },
+            "stock_movements": {
+                "columns": [
+                    "moved_at (TIMESTAMPTZ)",
+                    "product_id (INTEGER)",
+                    "warehouse_id (INTEGER)",
+                    "delta (INTEGER, positive = stock in, negative = stock out)",
+                    "quantity_after (INTEGER)"
+                ],
+                "description": "Append-only ledger of every inventory change, partitioned by month. Prefer the rollups for trends"
+            },
+            "stock_movements_hourly": {
+                "columns": [
+                    "bucket (TIMESTAMP, UTC hour)",
+                    "product_id (INTEGER)",
+                    "warehouse_id (INTEGER)",
+                    "inbound (BIGINT)",
+                    "outbound (BIGINT)",
+                    "movements (INTEGER)",
+                    "closing_quantity (INTEGER)"
+                ],
+                "description": "Stock in/out per product, warehouse and hour"
+            },
+            "stock_movements_daily": {
+                "columns": [
+                    "bucket (TIMESTAMP, UTC day)",
+                    "product_id (INTEGER)",
+                    "warehouse_id (INTEGER)",
+                    "inbound (BIGINT)",
+                    "outbound (BIGINT)",
+                    "movements (INTEGER)",
+                    "closing_quantity (INTEGER)"
+                ],
+                "description": "Stock in/out per product, warehouse and day"
             }
         },
         "common_queries": [
             "Find low stock items: JOIN products, inventory, warehouses WHERE inventory.quantity <= products.reorder_level",
             "Add inventory: INSERT INTO inventory or UPDATE inventory SET quantity = quantity + ?",
             "Get product info: SELECT from products JOIN categories",
-            "Inventory summary: JOIN all tables for comprehensive view"
+            "Inventory summary: JOIN all tables for comprehensive view",
+            "Sales velocity or trends: SUM(outbound) FROM stock_movements_daily WHERE bucket >= now() - interval 'N days' GROUP BY product_id"
         ]
     }
     
@@ -118,9 +243,15 @@ def get_low_stock_items(warehouse_id: int = None) -> List[Dict[str, Any]]:
     Args:
         warehouse_id: Optional warehouse ID to filter by
     """
+    # Served from the in-memory stock index once it has loaded
+    if stock_index.loaded:
+        return stock_index.low_stock(warehouse_id or None)
+    
     where_clause = ""
+    params = None
     if warehouse_id:
-        where_clause = f"AND i.warehouse_id = {warehouse_id}"
+        where_clause = "AND i.warehouse_id = %s"
+        params = (warehouse_id,)
     
     sql = f"""
     SELECT 
@@ -140,7 +271,7 @@ def get_low_stock_items(warehouse_id: int = None) -> List[Dict[str, Any]]:
     ORDER BY (p.reorder_level - i.quantity) DESC
     """
     
-    return execute_sql_query(sql)
+    return run_sql_query(sql, read_only=True, params=params)
 
 @mcp.tool()
 def add_inventory(product_id: int, warehouse_id: int, quantity: int) -> List[Dict[str, Any]]:
@@ -152,14 +283,173 @@ def add_inventory(product_id: int, warehouse_id: int, quantity: int) -> List[Dic
         warehouse_id: ID of the warehouse
         quantity: Quantity to add
     """
-    sql = f"""
+    sql = """
     INSERT INTO inventory (product_id, warehouse_id, quantity)
-    VALUES ({product_id}, {warehouse_id}, {quantity})
+    VALUES (%s, %s, %s)
     ON CONFLICT (product_id, warehouse_id)
-    DO UPDATE SET quantity = inventory.quantity + {quantity}
+    DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+    RETURNING quantity
+    """
+    
+    try:
+        _, rows = fetch_sql_rows(sql, read_only=False, params=(product_id, warehouse_id, quantity))
+    except Exception as e:
+        return [{"error": str(e), "status": "error"}]
+    
+    # Keep the in-memory stock index current without waiting for NOTIFY
+    stock_index.set_quantity(product_id, warehouse_id, rows[0][0])
+    return [{"affected_rows": len(rows), "status": "success"}]
+
+@mcp.tool()
+def get_warehouse_stock(warehouse_id: int) -> List[Dict[str, Any]]:
+    """
+    Get current stock of every product held at a warehouse.
+    
+    Args:
+        warehouse_id: ID of the warehouse
+    """
+    if stock_index.loaded:
+        return stock_index.warehouse_stock(warehouse_id)
+    
+    sql = """
+    SELECT 
+        p.id as product_id,
+        p.name as product_name,
+        c.name as category,
+        p.reorder_level,
+        i.quantity as current_stock,
+        w.location as warehouse,
+        p.price
+    FROM inventory i
+    JOIN products p ON p.id = i.product_id
+    JOIN categories c ON p.category_id = c.id
+    JOIN warehouses w ON i.warehouse_id = w.id
+    WHERE i.warehouse_id = %s
+    """
+    
+    return run_sql_query(sql, read_only=True, params=(warehouse_id,))
+
+@mcp.tool()
+def get_stock_trend(product_id: int, warehouse_id: int = None, days: int = 30,
+                    granularity: str = "day") -> List[Dict[str, Any]]:
+    """
+    Get stock movements of a product over time, from the hourly or daily rollups.
+    
+    Args:
+        product_id: ID of the product
+        warehouse_id: Optional warehouse ID; all warehouses are summed if omitted
+        days: Number of days to look back
+        granularity: "hour" or "day"
+    """
+    if granularity not in MOVEMENT_ROLLUPS:
+        return [{"error": f"Unknown granularity '{granularity}', expected one of {', '.join(MOVEMENT_ROLLUPS)}",
+                 "status": "error"}]
+    
+    where_clause = ""
+    params = [product_id, days]
+    if warehouse_id:
+        where_clause = "AND warehouse_id = %s"
+        params.append(warehouse_id)
+    
+    sql = f"""
+    SELECT 
+        bucket,
+        SUM(inbound) as inbound,
+        SUM(outbound) as outbound,
+        SUM(inbound) - SUM(outbound) as net,
+        SUM(movements) as movements
+    FROM {MOVEMENT_ROLLUPS[granularity]}
+    WHERE product_id = %s
+    AND bucket >= (now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+    {where_clause}
+    GROUP BY bucket
+    ORDER BY bucket
     """
     
-    return execute_sql_query(sql)
+    return run_sql_query(sql, read_only=True, params=tuple(params))
+
+@mcp.tool()
+def get_stock_velocity(warehouse_id: int = None, days: int = 30, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Get the fastest-moving products: units shipped out over the last days,
+    average per day and how many days the current stock will last.
+    
+    Args:
+        warehouse_id: Optional warehouse ID to filter by
+        days: Number of days to look back
+        limit: Maximum number of products to return
+    """
+    where_clause = ""
+    stock_clause = ""
+    filter_params = []
+    if warehouse_id:
+        where_clause = "AND warehouse_id = %s"
+        stock_clause = "AND i.warehouse_id = %s"
+        filter_params = [warehouse_id]
+    params = [days, *filter_params, days, days, *filter_params, limit]
+    
+    sql = f"""
+    WITH moved AS (
+        SELECT product_id, SUM(inbound) as units_in, SUM(outbound) as units_out
+        FROM stock_movements_daily
+        WHERE bucket >= date_trunc('day', now() AT TIME ZONE 'UTC') - make_interval(days => %s)
+        {where_clause}
+        GROUP BY product_id
+    )
+    SELECT 
+        p.id as product_id,
+        p.name as product_name,
+        m.units_in,
+        m.units_out,
+        ROUND(m.units_out::numeric / %s, 2) as avg_daily_outbound,
+        s.current_stock,
+        ROUND(s.current_stock * %s::numeric / m.units_out, 1) as days_of_cover
+    FROM moved m
+    JOIN products p ON p.id = m.product_id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(i.quantity), 0) as current_stock
+        FROM inventory i
+        WHERE i.product_id = m.product_id
+        {stock_clause}
+    ) s
+    WHERE m.units_out > 0
+    ORDER BY m.units_out DESC
+    LIMIT %s
+    """
+    
+    return run_sql_query(sql, read_only=True, params=tuple(params))
+
+@mcp.tool()
+def get_reorder_recommendations(warehouse_id: int = None, limit: int = 100) -> Dict[str, Any]:
+    """
+    Plan purchase orders: for every stocked product/warehouse pair, decide whether
+    to reorder, how much, from which supplier and at what cost.
+    Returns overall and per-supplier totals plus the most urgent order lines.
+    
+    Args:
+        warehouse_id: Optional warehouse ID to plan for
+        limit: Maximum number of order lines to return
+    """
+    # Import here so numpy is only loaded when planning is used
+    from inventory.reorder import reorder_plan
+    
+    conn = None
+    try:
+        conn = get_db_connection(read_only=True)
+        apply_session_limits(conn, read_only=True)
+        with span("reorder.plan"):
+            plan = reorder_plan(conn, warehouse_id, limit)
+        return {
+            "summary": plan["summary"],
+            "recommendations": [dict(zip(plan["columns"], row)) for row in plan["rows"]]
+        }
+    
+    except Exception as e:
+        return {"error": str(e), "status": "error"}
+    finally:
+        if conn:
+            conn.rollback()
+            conn.close()
 
 @mcp.tool()
 def get_inventory_summary() -> List[Dict[str, Any]]:
@@ -187,7 +477,7 @@ def get_inventory_summary() -> List[Dict[str, Any]]:
     ORDER BY stock_status DESC, p.name
     """
     
-    return execute_sql_query(sql)
+    return run_sql_query(sql, read_only=True)
 
 if __name__ == "__main__":
     # Run the MCP server
@@ -0,0 +1,60 @@
+import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+
+# Payload shapes supported by the query endpoints
+ROW_SHAPES = ("rows", "columnar")
+
+def _default(obj: Any) -> Any:
+    """Encode the database types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (memoryview, bytes, bytearray)):
+        return bytes(obj).hex()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def shape_rows(columns: Sequence[str], rows: List[tuple], shape: str = "rows") -> Any:
+    """
+    Arrange raw row tuples into the requested payload shape.
+
+    Args:
+        columns: Column names from the cursor description
+        rows: Row tuples as returned by the cursor
+        shape: "rows" for a list of objects, "columnar" for column names once
+               plus one array of values per column
+    """
+    if shape == "columnar":
+        if rows:
+            data = [list(values) for values in zip(*rows)]
+        else:
+            data = [[] for _ in columns]
+        return {"columns": list(columns), "data": data}
+
+    return [dict(zip(columns, row)) for row in rows]
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a payload to JSON bytes"""
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def rows_response(envelope: Dict[str, Any], columns: Sequence[str], rows: List[tuple],
+                  shape: str = "rows", key: str = "results",
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build a JSON response straight from row tuples, bypassing jsonable_encoder.
+
+    Args:
+        envelope: Extra top-level fields for the response body
+        columns: Column names from the cursor description
+        rows: Row tuples as returned by the cursor
+        shape: Payload shape, one of ROW_SHAPES
+        key: Name of the field that holds the rows
+        headers: Optional extra response headers
+    """
+    body = dict(envelope)
+    body[key] = shape_rows(columns, rows, shape)
+    return Response(content=dumps(body), media_type="application/json", headers=headers)
@@ -0,0 +1,123 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Buckets from sub-millisecond parsing up to multi-second LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "smart_ims_stage_seconds", "Time spent in each processing stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "smart_ims_request_seconds", "HTTP request latency", ["method", "path"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_TOTAL = Counter(
+    "smart_ims_requests_total", "HTTP requests handled", ["method", "path", "status"]
+)
+TOOL_CALLS_TOTAL = Counter(
+    "smart_ims_tool_calls_total", "MCP tool calls", ["tool", "outcome"]
+)
+QUERY_ROWS = Histogram(
+    "smart_ims_query_rows", "Rows returned per SQL statement",
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+)
+LLM_TOKENS_TOTAL = Counter(
+    "smart_ims_llm_tokens_total", "Tokens generated by the LLM"
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "smart_ims_llm_tokens_per_second", "LLM generation speed",
+    buckets=(1, 5, 10, 20, 40, 80, 160, 320, 640)
+)
+
+# (stage, seconds) spans recorded for the current request, if any
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a block, record it in the stage histogram and, inside a request,
+    in that request's timing breakdown.
+
+    Args:
+        stage: Stage name, e.g. "ollama.generate" or "db.execute"
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+def start_request_spans() -> Tuple[List[Tuple[str, float]], contextvars.Token]:
+    """Begin collecting spans for the current request"""
+    spans: List[Tuple[str, float]] = []
+    return spans, _request_spans.set(spans)
+
+def end_request_spans(token: contextvars.Token):
+    _request_spans.reset(token)
+
+def server_timing_header(spans: List[Tuple[str, float]], total: float) -> str:
+    """Format spans as a Server-Timing header value (durations in ms)"""
+    entries = [f"{stage.replace('.', '_')};dur={seconds * 1000:.2f}" for stage, seconds in spans]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+def record_llm_generation(tokens: Optional[int], eval_duration_ns: Optional[int]):
+    """Record token counts and speed reported by Ollama"""
+    if not tokens:
+        return
+    LLM_TOKENS_TOTAL.inc(tokens)
+    if eval_duration_ns:
+        LLM_TOKENS_PER_SECOND.observe(tokens / (eval_duration_ns / 1e9))
+
+class _RuntimeCollector:
+    """Reports cache and connection state that lives in other modules at scrape time"""
+
+    def describe(self):
+        # Nothing to describe up front; avoids a collect() at registration
+        return []
+
+    def collect(self):
+        # Import here to avoid circular imports
+        from llm.sql_validator import is_read_statement, validate_sql
+        from mcp_system.mcp_server import db_router
+
+        hits = CounterMetricFamily("smart_ims_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("smart_ims_cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("smart_ims_cache_entries", "Entries held in the cache", labels=["cache"])
+        for name, cached in (("sql_validation", validate_sql), ("sql_classification", is_read_statement)):
+            info = cached.cache_info()
+            hits.add_metric([name], info.hits)
+            misses.add_metric([name], info.misses)
+            size.add_metric([name], info.currsize)
+        yield hits
+        yield misses
+        yield size
+
+        connections = GaugeMetricFamily(
+            "smart_ims_db_connections_active", "Open database connections", labels=["target"]
+        )
+        connections.add_metric(["primary"], db_router.primary_active)
+        lag = GaugeMetricFamily("smart_ims_replica_lag_seconds", "Last measured replica lag", labels=["target"])
+        for replica in db_router.status():
+            connections.add_metric([replica["replica"]], replica["active_connections"])
+            if replica["lag_seconds"] is not None:
+                lag.add_metric([replica["replica"]], replica["lag_seconds"])
+        yield connections
+        yield lag
+
+REGISTRY.register(_RuntimeCollector())
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL_MS', '2')) / 1000
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack at a fixed interval and aggregates the
+    stacks in the collapsed format used by flamegraph.pl and speedscope.
+
+    The API handlers run on the event loop thread, so a profile of one
+    request also contains whatever other requests ran on the loop meanwhile.
+
+    Args:
+        thread_id: Thread to sample, defaults to the calling thread
+        interval: Seconds between samples
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
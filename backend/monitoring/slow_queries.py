@@ -0,0 +1,104 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are recorded
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '500'))
+# Read-only statements slower than this also get an EXPLAIN ANALYZE plan; 0 disables
+SLOW_QUERY_EXPLAIN_MS = float(os.getenv('SLOW_QUERY_EXPLAIN_MS', '2000'))
+# Number of entries kept in the ring buffer
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', '200'))
+
+class SlowQueryLog:
+    """
+    Bounded ring buffer of slow statements.
+    EXPLAIN ANALYZE re-runs the statement, so plans are only captured for
+    reads and are collected on a background thread, off the request path.
+    """
+
+    def __init__(self, threshold_ms: float, explain_ms: float, size: int):
+        self.threshold_ms = threshold_ms
+        self.explain_ms = explain_ms
+        self.entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def record(self, sql: str, params: Optional[Any], duration_ms: float, rows: int, read_only: bool):
+        """
+        Record a statement if it crossed the threshold.
+
+        Args:
+            sql: The statement as executed
+            params: Query parameters, if any
+            duration_ms: Execution plus fetch time
+            rows: Rows returned or affected
+            read_only: Whether the statement only reads data
+        """
+        if duration_ms < self.threshold_ms:
+            return
+
+        with self._lock:
+            entry = {
+                "id": self._next_id,
+                "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "sql": sql,
+                "params": list(params) if isinstance(params, (list, tuple)) else params,
+                "duration_ms": round(duration_ms, 2),
+                "rows": rows,
+                "read_only": read_only,
+                "plan": None,
+            }
+            self._next_id += 1
+            self.entries.append(entry)
+
+        logger.warning(f"Slow query ({duration_ms:.0f}ms, {rows} rows): {sql[:200]}")
+
+        if read_only and self.explain_ms and duration_ms >= self.explain_ms:
+            self._explainer.submit(self._explain, entry)
+
+    def _explain(self, entry: Dict[str, Any]):
+        """Attach an EXPLAIN ANALYZE plan to an entry"""
+        # Import here to avoid circular imports
+        from mcp_system.mcp_server import get_db_connection
+        from mcp_system.guardrails import apply_session_limits, strip_statement
+
+        conn = None
+        try:
+            conn = get_db_connection(read_only=True)
+            apply_session_limits(conn, entry["sql"], read_only=entry["read_only"])
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {strip_statement(entry['sql'])}",
+                           entry["params"])
+            plan = cursor.fetchone()[0]
+            entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as e:
+            entry["plan"] = {"error": str(e)}
+        finally:
+            if conn:
+                conn.rollback()
+                conn.close()
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries, newest first"""
+        with self._lock:
+            entries = list(reversed(self.entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+# Global slow query log instance
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_EXPLAIN_MS, SLOW_QUERY_LOG_SIZE)
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from mcp_system import guardrails
+from mcp_system.guardrails import (GuardrailError, check_single_statement, guard_statement,
+                                   statement_kind, strip_statement)
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        self.conn.params.append(params)
+
+    def fetchone(self):
+        return (json.dumps([{"Plan": {"Total Cost": self.conn.cost, "Plan Rows": self.conn.rows}}]),)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Records session settings and statements; EXPLAIN returns the given estimate"""
+
+    def __init__(self, cost=10.0, rows=10):
+        self.cost = cost
+        self.rows = rows
+        self.readonly = None
+        self.executed = []
+        self.params = []
+
+    def set_session(self, readonly):
+        self.readonly = readonly
+
+    def cursor(self):
+        return FakeCursor(self)
+
+@pytest.mark.parametrize("sql, kind", [
+    ("SELECT 1", "SELECT"),
+    ("  (select 1)", "SELECT"),
+    ("-- DELETE\nSELECT 1", "SELECT"),
+    ("/* UPDATE */ insert into t values (1)", "INSERT"),
+    ("'DROP' SELECT", "SELECT"),
+])
+def test_statement_kind_ignores_comments_and_literals(sql, kind):
+    assert statement_kind(sql) == kind
+
+@pytest.mark.parametrize("sql", [
+    "SELECT ';' FROM products",
+    'SELECT 1 AS "a;b"',
+    "SELECT 1 -- trailing; comment",
+    "SELECT $body$ ; $body$",
+    "SELECT 1;",
+])
+def test_masked_semicolons_are_one_statement(sql):
+    check_single_statement(sql)
+
+def test_several_statements_are_refused():
+    with pytest.raises(GuardrailError):
+        check_single_statement("SELECT 1; DROP TABLE products")
+
+def test_strip_statement():
+    assert strip_statement("  SELECT 1 ;\n") == "SELECT 1"
+
+def test_read_sets_read_only_session_and_timeout():
+    conn = FakeConnection()
+    assert guard_statement(conn, "SELECT * FROM products") == "SELECT * FROM products"
+    assert conn.readonly is True
+    assert conn.executed[0].startswith("SET LOCAL statement_timeout")
+    assert conn.executed[1].startswith("EXPLAIN (FORMAT JSON) SELECT * FROM products")
+
+def test_timeout_override(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_STATEMENT_TIMEOUT_MS", 30000)
+
+    for timeout_ms, expected in ((None, 30000), (3600000, 3600000), (0, 0)):
+        conn = FakeConnection()
+        guard_statement(conn, "SELECT * FROM products", timeout_ms=timeout_ms)
+        assert conn.params[0] == (expected,)
+
+def test_large_read_is_capped(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_MAX_ROWS", 100)
+    conn = FakeConnection(rows=5000)
+
+    sql = guard_statement(conn, "SELECT * FROM inventory;")
+    assert sql == "SELECT * FROM (SELECT * FROM inventory) AS capped LIMIT 100"
+    assert guard_statement(conn, "SELECT * FROM inventory", cap_rows=False) == "SELECT * FROM inventory"
+
+def test_large_read_is_rejected_when_configured(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_MAX_ROWS", 100)
+    monkeypatch.setattr(guardrails, "SQL_ROW_CAP_ACTION", "reject")
+
+    with pytest.raises(GuardrailError, match="exceeds limit 100"):
+        guard_statement(FakeConnection(rows=5000), "SELECT * FROM inventory")
+
+def test_writes_are_never_capped(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_MAX_ROWS", 100)
+    conn = FakeConnection(rows=5000)
+
+    sql = "UPDATE inventory SET quantity = 0"
+    assert guard_statement(conn, sql) == sql
+    assert conn.readonly is False
+
+def test_caller_classification_wins(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_MAX_ROWS", 100)
+    conn = FakeConnection(rows=5000)
+
+    assert guard_statement(conn, "SELECT * FROM inventory", read_only=False) == "SELECT * FROM inventory"
+    assert conn.readonly is False
+
+def test_expensive_statement_is_rejected(monkeypatch):
+    monkeypatch.setattr(guardrails, "SQL_MAX_COST", 1000)
+
+    with pytest.raises(GuardrailError, match="estimated cost"):
+        guard_statement(FakeConnection(cost=5000), "SELECT * FROM inventory")
+
+def test_unexplainable_statements_skip_explain():
+    conn = FakeConnection()
+    assert guard_statement(conn, "SHOW statement_timeout") == "SHOW statement_timeout"
+    assert not any(sql.startswith("EXPLAIN") for sql in conn.executed)
@@ -0,0 +1,81 @@
+import pytest
+
+from llm import sql_validator
+from llm.sql_validator import is_read_statement, validate_sql
+
+SCHEMA = {
+    "products": frozenset({"id", "name", "category_id", "price", "reorder_level"}),
+    "categories": frozenset({"id", "name"}),
+    "inventory": frozenset({"product_id", "warehouse_id", "quantity"}),
+    "warehouses": frozenset({"id", "location"}),
+}
+
+@pytest.fixture(autouse=True)
+def schema(monkeypatch):
+    """Validate against a fixed schema instead of the MCP server's"""
+    monkeypatch.setattr(sql_validator, "_schema", SCHEMA)
+    validate_sql.cache_clear()
+    yield
+    validate_sql.cache_clear()
+
+def test_valid_select_with_aliases():
+    result = validate_sql(
+        "SELECT p.name, i.quantity FROM products p JOIN inventory i ON i.product_id = p.id "
+        "WHERE i.quantity <= p.reorder_level"
+    )
+    assert result.valid, result.error
+    assert result.kind == "SELECT"
+    assert result.read_only
+    assert result.tables == {"products", "inventory"}
+
+@pytest.mark.parametrize("sql, error", [
+    ("SELECT * FROM orders", "Unknown table"),
+    ("SELECT p.sku FROM products p", "Unknown column: p.sku"),
+    ("SELECT x.name FROM products p", "Unknown table or alias: x"),
+    ("SELECT sku FROM products", "Unknown column: sku"),
+    ("SELECT 1; SELECT 2", "Expected exactly one SQL statement"),
+])
+def test_invalid_references(sql, error):
+    result = validate_sql(sql)
+    assert not result.valid
+    assert error in result.error
+
+def test_join_using_requires_the_column_on_both_sides():
+    # products has no product_id and inventory has no id
+    assert not validate_sql("SELECT p.name FROM products p JOIN inventory i USING (id)").valid
+    assert not validate_sql("SELECT p.name FROM products p JOIN inventory i USING (product_id)").valid
+    result = validate_sql("SELECT location FROM warehouses JOIN inventory USING (quantity)")
+    assert "Unknown column in USING: quantity" in result.error
+
+    assert validate_sql("SELECT c.name FROM products p JOIN categories c USING (id)").valid
+    assert validate_sql(
+        "SELECT quantity FROM inventory i JOIN inventory j USING (product_id, warehouse_id)"
+    ).valid
+
+def test_join_using_skips_ctes():
+    result = validate_sql(
+        "WITH low AS (SELECT product_id AS id FROM inventory WHERE quantity < 5) "
+        "SELECT name FROM low JOIN products USING (id)"
+    )
+    assert result.valid, result.error
+
+def test_output_aliases_are_visible():
+    result = validate_sql("SELECT quantity AS stock FROM inventory ORDER BY stock DESC")
+    assert result.valid, result.error
+
+def test_writes_are_not_read_only():
+    result = validate_sql("UPDATE inventory SET quantity = quantity + 1 WHERE product_id = 1")
+    assert result.valid, result.error
+    assert not result.read_only
+
+@pytest.mark.parametrize("sql, read_only", [
+    ("SELECT * FROM products", True),
+    ("WITH p AS (SELECT id FROM products) SELECT * FROM p", True),
+    ("WITH d AS (DELETE FROM inventory RETURNING *) SELECT * FROM d", False),
+    ("SELECT 'DELETE FROM inventory'", True),
+    ("INSERT INTO categories (name) VALUES ('Toys')", False),
+    ("SELECT 1; DELETE FROM inventory", False),
+    ("not sql at all (", False),
+])
+def test_is_read_statement(sql, read_only):
+    assert is_read_statement(sql) is read_only
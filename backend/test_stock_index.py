@@ -0,0 +1,94 @@
+from inventory.stock_index import StockIndex, StockListener
+
+class RecordingEvents:
+    """Collects published events instead of fanning them out"""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+def make_index():
+    events = RecordingEvents()
+    index = StockIndex(events)
+    index.products = {1: ("Laptop", "Electronics", 999.0, 10), 2: ("Desk", None, 150.0, 5)}
+    index.warehouses = {1: "North", 2: "South"}
+    index.loaded = True
+    index.set_quantity(1, 1, 50)
+    index.set_quantity(1, 2, 20)
+    events.events.clear()
+    return index, events
+
+def test_crossing_reorder_level_publishes_once():
+    index, events = make_index()
+
+    index.set_quantity(1, 1, 10)
+    index.set_quantity(1, 1, 8)
+    assert [event["event"] for event in events.events] == ["low_stock"]
+    assert events.events[0]["warehouse_id"] == 1
+    assert [entry["current_stock"] for entry in index.low_stock()] == [8]
+
+    index.set_quantity(1, 1, 11)
+    assert [event["event"] for event in events.events] == ["low_stock", "restocked"]
+    assert index.low_stock() == []
+
+def test_reorder_level_change_moves_entries():
+    index, events = make_index()
+
+    index.set_reorder_level(1, 30)
+    assert [(event["event"], event["warehouse_id"]) for event in events.events] == [("low_stock", 2)]
+    assert [entry["warehouse"] for entry in index.low_stock()] == ["South"]
+    assert index.low_stock(warehouse_id=1) == []
+
+def test_entries_match_sql_columns():
+    index, _ = make_index()
+    index.set_quantity(1, 1, 0)
+
+    assert list(index.low_stock()[0]) == ["product_id", "product_name", "category", "reorder_level",
+                                          "current_stock", "warehouse", "price"]
+
+def test_products_without_category_are_not_listed():
+    index, events = make_index()
+    index.set_quantity(2, 1, 1)
+
+    assert [event["product_id"] for event in events.events] == [2]
+    assert index.low_stock() == []
+    assert [entry["product_id"] for entry in index.warehouse_stock(1)] == [1]
+
+def test_delete_drops_the_entry_without_alerts():
+    index, events = make_index()
+    index.set_quantity(1, 2, 3)
+    events.events.clear()
+
+    index.remove(1, 2)
+    assert events.events == []
+    assert len(index) == 1
+    assert index.low_stock() == []
+    assert index.warehouse_stock(2) == []
+    assert 2 not in index.warehouse_slots
+    assert index.status()["low_stock_entries"] == 0
+
+    # The freed slot is reused and the pair starts fresh
+    index.set_quantity(1, 2, 4)
+    assert len(index.product_ids) == 2
+    assert [entry["current_stock"] for entry in index.warehouse_stock(2)] == [4]
+    assert [event["event"] for event in events.events] == ["low_stock"]
+
+def test_delete_of_unknown_pair_is_ignored():
+    index, events = make_index()
+
+    index.remove(1, 99)
+    index.remove(42, 1)
+    assert len(index) == 2
+    assert events.events == []
+
+def test_listener_routes_delete_notifications():
+    index, events = make_index()
+    listener = StockListener(index, connect=None)
+
+    assert listener.handle('{"table": "inventory", "op": "DELETE", "product_id": 1, "warehouse_id": 1}') is False
+    assert listener.handle('{"table": "inventory", "op": "DELETE", "product_id": 1, "warehouse_id": 1}') is False
+    assert (1, 1) not in index.slots
+    assert events.events == []
+    assert listener.handle('{"op": "RELOAD"}') is True